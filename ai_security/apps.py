@@ -1,6 +1,50 @@
+import json
+import logging
+import os
+import tempfile
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class AiSecurityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_security'
+
+    def ready(self):
+        import ai_security.signals  # noqa: F401
+        self._configurar_credenciales_google()
+
+    @staticmethod
+    def _configurar_credenciales_google():
+        """
+        Deja GOOGLE_APPLICATION_CREDENTIALS apuntando a las credenciales de Google Cloud,
+        escribiendo el archivo temporal una sola vez por proceso.
+        """
+        actual = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')
+        if actual and os.path.exists(actual):
+            return
+
+        credentials_json = getattr(settings, 'GOOGLE_CLOUD_CREDENTIALS_JSON', None)
+        credentials_path = getattr(settings, 'GOOGLE_CLOUD_CREDENTIALS_PATH', None)
+
+        if credentials_json:
+            # Credenciales desde variable de entorno (producción)
+            try:
+                if isinstance(credentials_json, str):
+                    json_data = json.loads(credentials_json)
+                else:
+                    json_data = credentials_json
+
+                with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as temp_file:
+                    json.dump(json_data, temp_file)
+
+                os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = temp_file.name
+                logger.debug("Credenciales de Google Cloud guardadas en: %s", temp_file.name)
+            except Exception as e:
+                logger.error("Error procesando credenciales JSON de Google Cloud: %s", e)
+        elif credentials_path and os.path.exists(credentials_path):
+            # Archivo local (desarrollo)
+            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = str(credentials_path)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_security', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vehicleaccesslog',
+            name='resultado',
+            field=models.CharField(choices=[('autorizado', 'Autorizado'), ('denegado', 'Denegado'), ('desconocido', 'Desconocido'), ('procesando', 'Procesando')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_security', '0002_alter_vehicleaccesslog_resultado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicleaccesslog',
+            index=models.Index(fields=['vehicle', '-timestamp_evento'], name='vehicle_log_vehicle_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.24 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_security', '0003_vehicleaccesslog_vehicle_log_vehicle_ts_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicleaccesslog',
+            index=models.Index(fields=['-timestamp_evento'], name='vehicle_log_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facialaccesslog',
+            index=models.Index(fields=['person_profile', '-timestamp_evento'], name='facial_log_profile_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facialaccesslog',
+            index=models.Index(fields=['-timestamp_evento'], name='facial_log_ts_idx'),
+        ),
+    ]
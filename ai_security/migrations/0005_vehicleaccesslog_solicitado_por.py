@@ -0,0 +1,21 @@
+# Generated by Django 4.2.24 on 2026-10-16 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ai_security', '0004_access_log_timestamp_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleaccesslog',
+            name='solicitado_por',
+            field=models.ForeignKey(blank=True, help_text='Usuario que encoló el reconocimiento asíncrono', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reconocimientos_placa', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -31,6 +31,7 @@ class VehicleAccessLog(TimeStampedModel):
         ('autorizado', 'Autorizado'),
         ('denegado', 'Denegado'),
         ('desconocido', 'Desconocido'),
+        ('procesando', 'Procesando'),
     ]
 
     vehicle = models.ForeignKey(Vehicle, on_delete=models.SET_NULL, null=True, blank=True, related_name='access_logs')
@@ -39,12 +40,20 @@ class VehicleAccessLog(TimeStampedModel):
     resultado = models.CharField(max_length=20, choices=ACCESS_RESULT_CHOICES)
     imagen = models.ImageField(upload_to='vehicle_images/', null=True, blank=True)
     timestamp_evento = models.DateTimeField(auto_now_add=True)
+    solicitado_por = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='reconocimientos_placa',
+        help_text="Usuario que encoló el reconocimiento asíncrono"
+    )
 
     class Meta:
         db_table = 'vehicle_access_logs'
         verbose_name = 'Log de Acceso Vehicular'
         verbose_name_plural = 'Logs de Acceso Vehicular'
         ordering = ['-timestamp_evento']
+        indexes = [
+            models.Index(fields=['vehicle', '-timestamp_evento'], name='vehicle_log_vehicle_ts_idx'),
+            models.Index(fields=['-timestamp_evento'], name='vehicle_log_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.placa_detectada} - {self.resultado} ({self.timestamp_evento})"
@@ -124,6 +133,10 @@ class FacialAccessLog(TimeStampedModel):
         verbose_name = 'Log de Acceso Facial'
         verbose_name_plural = 'Logs de Acceso Facial'
         ordering = ['-timestamp_evento']
+        indexes = [
+            models.Index(fields=['person_profile', '-timestamp_evento'], name='facial_log_profile_ts_idx'),
+            models.Index(fields=['-timestamp_evento'], name='facial_log_ts_idx'),
+        ]
 
     def __str__(self):
         name = self.detected_name if self.detected_name else 'Desconocido'
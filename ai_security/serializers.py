@@ -6,7 +6,21 @@ from .models import (
 from apps.users.serializers import UserSerializer
 
 
-class VehicleSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Permite limitar los campos serializados pasando el argumento ``fields``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class VehicleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo Vehicle.
     """
@@ -44,7 +58,7 @@ class VehicleSerializer(serializers.ModelSerializer):
         )
 
 
-class VehicleAccessLogSerializer(serializers.ModelSerializer):
+class VehicleAccessLogSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer para el modelo VehicleAccessLog.
     """
@@ -87,6 +101,20 @@ class VehicleOCRRequestSerializer(serializers.Serializer):
         return value
 
 
+class VehicleOCRBulkRequestSerializer(serializers.Serializer):
+    """
+    Serializer para procesar varias imágenes de vehículos en un solo request.
+    """
+    imagenes = serializers.ListField(child=serializers.ImageField(), min_length=1, max_length=20)
+
+    def validate_imagenes(self, value):
+        """
+        Aplicar a cada imagen las mismas validaciones que en el reconocimiento individual.
+        """
+        validator = VehicleOCRRequestSerializer()
+        return [validator.validate_imagen(imagen) for imagen in value]
+
+
 class VehicleOCRResponseSerializer(serializers.Serializer):
     """
     Serializer para respuestas de OCR de vehículos.
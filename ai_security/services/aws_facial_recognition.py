@@ -1,4 +1,5 @@
 import logging
+from functools import lru_cache
 import boto3
 from typing import List, Optional, Tuple, Dict, Any
 from django.conf import settings
@@ -65,12 +66,12 @@ class AWSFacialRecognitionService:
         with open(image_path, 'rb') as image_file:
             return image_file.read()
 
-    def index_face(self, image_path: str, external_image_id: str) -> Optional[str]:
+    def index_face_bytes(self, image_bytes: bytes, external_image_id: str) -> Optional[str]:
         """
         Indexar una cara en la collection de AWS Rekognition.
 
         Args:
-            image_path: Ruta de la imagen
+            image_bytes: Contenido de la imagen
             external_image_id: ID externo para asociar (ej: person_profile_123)
 
         Returns:
@@ -79,9 +80,6 @@ class AWSFacialRecognitionService:
         try:
             logger.info(f"🔍 Indexando cara en AWS Rekognition: {external_image_id}")
 
-            # Leer imagen
-            image_bytes = self._read_image_bytes(image_path)
-
             # Indexar cara en AWS Rekognition
             response = self.rekognition_client.index_faces(
                 CollectionId=self.collection_id,
@@ -98,13 +96,13 @@ class AWSFacialRecognitionService:
                 logger.info(f"✅ Cara indexada exitosamente. FaceId: {face_id}, Confianza: {confidence:.2f}%")
                 return face_id
             else:
-                logger.warning(f"⚠️ No se detectó ninguna cara en la imagen: {image_path}")
+                logger.warning(f"⚠️ No se detectó ninguna cara en la imagen: {external_image_id}")
                 return None
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
             if error_code == 'InvalidParameterException':
-                logger.warning(f"⚠️ Imagen no válida o sin rostros detectables: {image_path}")
+                logger.warning(f"⚠️ Imagen no válida o sin rostros detectables: {external_image_id}")
             else:
                 logger.error(f"❌ Error AWS indexando cara: {e}")
             return None
@@ -112,22 +110,19 @@ class AWSFacialRecognitionService:
             logger.error(f"❌ Error indexando cara: {str(e)}")
             return None
 
-    def search_faces_by_image(self, image_path: str, threshold: float = 80.0) -> Tuple[Optional[str], float]:
+    def search_faces_by_image_bytes(self, image_bytes: bytes, threshold: float = 80.0) -> Tuple[Optional[str], float]:
         """
         Buscar caras similares en la collection usando una imagen.
 
         Args:
-            image_path: Ruta de la imagen a buscar
+            image_bytes: Contenido de la imagen a buscar
             threshold: Umbral mínimo de confianza (default: 80%)
 
         Returns:
             Tupla con (Face ID encontrado, confianza) o (None, 0.0)
         """
         try:
-            logger.info(f"🔍 Buscando cara en collection AWS: {image_path}")
-
-            # Leer imagen
-            image_bytes = self._read_image_bytes(image_path)
+            logger.info("🔍 Buscando cara en collection AWS")
 
             # Buscar caras similares
             response = self.rekognition_client.search_faces_by_image(
@@ -150,7 +145,7 @@ class AWSFacialRecognitionService:
         except ClientError as e:
             error_code = e.response['Error']['Code']
             if error_code == 'InvalidParameterException':
-                logger.warning(f"⚠️ No se detectó rostro en la imagen: {image_path}")
+                logger.warning("⚠️ No se detectó rostro en la imagen")
             else:
                 logger.error(f"❌ Error AWS buscando cara: {e}")
             return None, 0.0
@@ -189,10 +184,26 @@ class AWSFacialRecognitionService:
     def register_new_person(self, image_path: str, name: str, person_type: str,
                            is_authorized: bool = False, user=None) -> Dict[str, Any]:
         """
+        Registrar una nueva persona a partir de un archivo de imagen.
+        """
+        try:
+            image_bytes = self._read_image_bytes(image_path)
+        except OSError as e:
+            logger.error(f"❌ Error leyendo imagen {image_path}: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+        return self.register_new_person_bytes(image_bytes, name, person_type, is_authorized, user)
+
+    def register_new_person_bytes(self, image_bytes: bytes, name: str, person_type: str,
+                                  is_authorized: bool = False, user=None) -> Dict[str, Any]:
+        """
         Registrar una nueva persona usando AWS Rekognition.
 
         Args:
-            image_path: Ruta de la imagen
+            image_bytes: Contenido de la imagen
             name: Nombre de la persona
             person_type: Tipo de persona
             is_authorized: Si está autorizada
@@ -214,7 +225,7 @@ class AWSFacialRecognitionService:
 
             # Indexar cara en AWS Rekognition
             external_image_id = f"person_profile_{person_profile.id}"
-            aws_face_id = self.index_face(image_path, external_image_id)
+            aws_face_id = self.index_face_bytes(image_bytes, external_image_id)
 
             if not aws_face_id:
                 # Si falla la indexación, eliminar el perfil
@@ -229,12 +240,11 @@ class AWSFacialRecognitionService:
             person_profile.save()
 
             # Copiar imagen al storage del perfil
-            with open(image_path, 'rb') as image_file:
-                person_profile.photo.save(
-                    f"person_{person_profile.id}.jpg",
-                    ContentFile(image_file.read()),
-                    save=True
-                )
+            person_profile.photo.save(
+                f"person_{person_profile.id}.jpg",
+                ContentFile(image_bytes),
+                save=True
+            )
 
             logger.info(f"✅ Persona registrada exitosamente: {name} (FaceId: {aws_face_id})")
             return {
@@ -250,22 +260,22 @@ class AWSFacialRecognitionService:
                 'error': str(e)
             }
 
-    def identify_person(self, image_path: str, threshold: float = 80.0) -> Dict[str, Any]:
+    def identify_person_bytes(self, image_bytes: bytes, threshold: float = 80.0) -> Dict[str, Any]:
         """
         Identificar una persona usando AWS Rekognition.
 
         Args:
-            image_path: Ruta de la imagen a analizar
+            image_bytes: Contenido de la imagen a analizar
             threshold: Umbral mínimo de confianza
 
         Returns:
             Diccionario con resultado de identificación
         """
         try:
-            logger.info(f"🔍 Iniciando identificación con AWS Rekognition: {image_path}")
+            logger.info("🔍 Iniciando identificación con AWS Rekognition")
 
             # Buscar cara en la collection
-            aws_face_id, confidence = self.search_faces_by_image(image_path, threshold)
+            aws_face_id, confidence = self.search_faces_by_image_bytes(image_bytes, threshold)
 
             if not aws_face_id:
                 logger.info("❌ Persona no reconocida por AWS Rekognition")
@@ -311,10 +321,26 @@ class AWSFacialRecognitionService:
     def process_access_request(self, image_path: str, location: str = 'Entrada Principal',
                               threshold: float = 80.0) -> Dict[str, Any]:
         """
+        Procesar solicitud de acceso facial a partir de un archivo de imagen.
+        """
+        try:
+            image_bytes = self._read_image_bytes(image_path)
+        except OSError as e:
+            logger.error(f"❌ Error leyendo imagen {image_path}: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+        return self.process_access_request_bytes(image_bytes, location, threshold)
+
+    def process_access_request_bytes(self, image_bytes: bytes, location: str = 'Entrada Principal',
+                                     threshold: float = 80.0) -> Dict[str, Any]:
+        """
         Procesar solicitud completa de acceso facial con AWS Rekognition.
 
         Args:
-            image_path: Ruta de la imagen
+            image_bytes: Contenido de la imagen
             location: Ubicación del acceso
             threshold: Umbral de confianza
 
@@ -323,7 +349,7 @@ class AWSFacialRecognitionService:
         """
         try:
             # Identificar persona
-            identification_result = self.identify_person(image_path, threshold)
+            identification_result = self.identify_person_bytes(image_bytes, threshold)
 
             if not identification_result['success']:
                 return identification_result
@@ -333,8 +359,8 @@ class AWSFacialRecognitionService:
             access_granted = identification_result.get('access_granted', False)
 
             # Registrar intento de acceso
-            access_log = self.log_access_attempt(
-                image_path=image_path,
+            access_log = self.log_access_attempt_bytes(
+                image_bytes=image_bytes,
                 person_profile=person_profile,
                 confidence=confidence,
                 access_granted=access_granted,
@@ -358,14 +384,14 @@ class AWSFacialRecognitionService:
                 'error': str(e)
             }
 
-    def log_access_attempt(self, image_path: str, person_profile: Optional[PersonProfile] = None,
-                          confidence: float = 0.0, access_granted: bool = False,
-                          location: str = 'Entrada Principal', detected_name: str = '') -> FacialAccessLog:
+    def log_access_attempt_bytes(self, image_bytes: bytes, person_profile: Optional[PersonProfile] = None,
+                                 confidence: float = 0.0, access_granted: bool = False,
+                                 location: str = 'Entrada Principal', detected_name: str = '') -> FacialAccessLog:
         """
         Registrar intento de acceso facial.
 
         Args:
-            image_path: Ruta de la imagen del intento
+            image_bytes: Contenido de la imagen del intento
             person_profile: Perfil de la persona identificada
             confidence: Confianza de la identificación
             access_granted: Si se concedió el acceso
@@ -386,12 +412,11 @@ class AWSFacialRecognitionService:
             )
 
             # Guardar imagen del intento
-            with open(image_path, 'rb') as image_file:
-                access_log.photo.save(
-                    f"access_attempt_{access_log.id}.jpg",
-                    ContentFile(image_file.read()),
-                    save=True
-                )
+            access_log.photo.save(
+                f"access_attempt_{access_log.id}.jpg",
+                ContentFile(image_bytes),
+                save=True
+            )
 
             return access_log
 
@@ -423,4 +448,16 @@ class AWSFacialRecognitionService:
 
         except Exception as e:
             logger.error(f"❌ Error eliminando perfil: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+@lru_cache(maxsize=1)
+def get_facial_recognition_service() -> AWSFacialRecognitionService:
+    """
+    Devuelve el servicio compartido por el proceso.
+
+    Crear el servicio construye el cliente de Rekognition y verifica la collection en AWS;
+    el cliente de boto3 es thread-safe, así que una sola instancia atiende todos los requests.
+    Si la inicialización falla no queda en caché y se reintenta en la siguiente llamada.
+    """
+    return AWSFacialRecognitionService()
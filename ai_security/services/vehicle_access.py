@@ -0,0 +1,29 @@
+"""
+Decisión de acceso vehicular a partir del resultado del OCR de placas.
+"""
+
+from .vehicle_cache import get_vehicle_by_plate
+
+
+def evaluar_acceso_vehicular(ocr_result):
+    """
+    Devuelve (placa_detectada, vehiculo, resultado, mensaje) para un resultado de OCR.
+    """
+    detected_plate = ocr_result.get('plate') or ''  # Asegurar que nunca sea None
+    vehicle = None
+    resultado = 'desconocido'
+    message = 'No se detectó placa válida'
+
+    # Una sola consulta: el mismo vehículo sirve para autorizar y para el log
+    if detected_plate:
+        vehicle = get_vehicle_by_plate(detected_plate)
+
+    if ocr_result['success'] and detected_plate:
+        if vehicle is not None and vehicle.is_active:
+            resultado = 'autorizado'
+            message = f"Vehículo autorizado - {vehicle.user.get_full_name()}"
+        else:
+            resultado = 'denegado'
+            message = f"Vehículo no autorizado - Placa: {detected_plate}"
+
+    return detected_plate, vehicle, resultado, message
@@ -0,0 +1,49 @@
+"""
+Caché corta de vehículos por placa para el reconocimiento en portería.
+
+Las mismas placas se consultan muchas veces al día; se guardan unos segundos y se
+invalidan desde las señales de Vehicle (ver ai_security/signals.py).
+"""
+
+from django.core.cache import cache
+
+from ..models import Vehicle
+
+VEHICLE_CACHE_TIMEOUT = 30  # segundos
+
+# Columnas necesarias para autorizar una placa y serializar vehicle_info
+VEHICLE_LOOKUP_FIELDS = (
+    'id', 'user', 'placa', 'color', 'modelo', 'marca', 'is_active', 'created_at', 'updated_at',
+    'user__id', 'user__first_name', 'user__last_name',
+)
+
+# Marca para recordar que una placa no está registrada
+_NO_VEHICLE = 'no-vehicle'
+
+
+def vehicle_cache_key(placa):
+    return f'ai_security:vehicle:{placa}'
+
+
+def get_vehicle_by_plate(placa):
+    """
+    Devuelve el vehículo (con su dueño) registrado con la placa, o None.
+    """
+    key = vehicle_cache_key(placa)
+    cached = cache.get(key)
+    if cached is not None:
+        return None if cached == _NO_VEHICLE else cached
+
+    # Del dueño solo se necesita el nombre completo, no toda la fila de users
+    vehicle = (
+        Vehicle.objects.select_related('user')
+        .only(*VEHICLE_LOOKUP_FIELDS)
+        .filter(placa=placa)
+        .first()
+    )
+    cache.set(key, vehicle if vehicle is not None else _NO_VEHICLE, VEHICLE_CACHE_TIMEOUT)
+    return vehicle
+
+
+def invalidate_vehicle(placa):
+    cache.delete(vehicle_cache_key(placa))
@@ -1,15 +1,40 @@
+import hashlib
+import logging
 import re
 import os
-from django.conf import settings
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
 
 try:
     from google.cloud import vision
     import json
     GOOGLE_VISION_AVAILABLE = True
-    print("[OCR DEBUG] Google Vision API disponible")
+    logger.debug("Google Vision API disponible")
 except ImportError as e:
     GOOGLE_VISION_AVAILABLE = False
-    print(f"[OCR DEBUG] Google Vision no disponible: {e}")
+    logger.warning("Google Vision no disponible: %s", e)
+
+# Segundos durante los que se reutiliza la lectura de una imagen idéntica (cámara enviando el mismo cuadro)
+RECENT_READ_TIMEOUT = 10
+
+# Candidatos de placa boliviana dentro del texto completo del OCR; el separador puede
+# leerse como guión, espacio o punto ("1234-ABC", "1234 ABC", "1234.ABC") o faltar
+_PLATE_CANDIDATE_RE = re.compile(r'\b\d{3,4}[-\s.]?[A-Z]{2,3}\b|\b[A-Z]{2,3}[-\s.]?\d{3}\b')
+
+_vision_client = None
+
+
+def _get_vision_client():
+    """
+    Devuelve el cliente de Google Vision del proceso, creándolo en el primer uso.
+    Abrir el canal gRPC cuesta más que la propia detección, así que no se crea por imagen.
+    """
+    global _vision_client
+    if _vision_client is None:
+        _vision_client = vision.ImageAnnotatorClient()
+    return _vision_client
 
 
 class VehicleOCRService:
@@ -17,16 +42,6 @@ class VehicleOCRService:
     Servicio para reconocimiento OCR de placas vehiculares bolivianas.
     """
 
-    # Patrones de placas bolivianas
-    BOLIVIA_PLATE_PATTERNS = [
-        r'\b\d{4}-[A-Z]{3}\b',  # 1234-ABC (formato estándar con guión)
-        r'\b\d{3}-[A-Z]{3}\b',  # 123-ABC (formato antiguo con guión)
-        r'\b[A-Z]{3}-\d{3}\b',  # ABC-123 (formato especial con guión)
-        r'\b\d{4}[A-Z]{3}\b',   # 1234ABC (formato estándar sin guión)
-        r'\b\d{3}[A-Z]{3}\b',   # 123ABC (formato antiguo sin guión)
-        r'\b[A-Z]{3}\d{3}\b',   # ABC123 (formato especial sin guión)
-    ]
-
     @staticmethod
     def normalize_plate(plate):
         """
@@ -54,59 +69,35 @@ class VehicleOCRService:
     @staticmethod
     def extract_text_with_google_vision(image_path):
         """
-        Extrae texto de placa usando Google Vision API.
+        Extrae texto de placa usando Google Vision API a partir de un archivo.
+        """
+        try:
+            with open(image_path, 'rb') as image_file:
+                content = image_file.read()
+        except OSError as e:
+            logger.error("Error leyendo imagen %s: %s", image_path, e)
+            return None, 0.0
+
+        return VehicleOCRService.extract_text_with_google_vision_bytes(content)
+
+    @staticmethod
+    def extract_text_with_google_vision_bytes(content):
+        """
+        Extrae texto de placa usando Google Vision API a partir de los bytes de la imagen.
         """
         try:
             if not GOOGLE_VISION_AVAILABLE:
-                print("[OCR DEBUG] Google Vision no está disponible")
+                logger.debug("Google Vision no está disponible")
                 return None, 0.0
 
-            # Configurar credenciales (desde variable de entorno o archivo local)
-            credentials_json = getattr(settings, 'GOOGLE_CLOUD_CREDENTIALS_JSON', None)
-            credentials_path = getattr(settings, 'GOOGLE_CLOUD_CREDENTIALS_PATH', None)
-
-            if credentials_json:
-                # Usar credenciales desde variable de entorno (producción)
-                print("[OCR DEBUG] Usando credenciales de Google Cloud desde variable de entorno")
-                try:
-                    # Crear archivo temporal con las credenciales
-                    import tempfile
-                    import json
-
-                    # Validar que el JSON sea válido
-                    if isinstance(credentials_json, str):
-                        json_data = json.loads(credentials_json)
-                    else:
-                        json_data = credentials_json
-
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as temp_file:
-                        json.dump(json_data, temp_file)
-                        temp_credentials_path = temp_file.name
-
-                    os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = temp_credentials_path
-                    print(f"[OCR DEBUG] Credenciales guardadas en: {temp_credentials_path}")
-
-                except Exception as cred_error:
-                    print(f"[OCR DEBUG] Error procesando credenciales JSON: {cred_error}")
-                    print(f"[OCR DEBUG] Tipo de credentials_json: {type(credentials_json)}")
-                    print(f"[OCR DEBUG] Primeros 100 chars: {str(credentials_json)[:100]}")
-                    return None, 0.0
-            elif credentials_path and os.path.exists(credentials_path):
-                # Usar archivo local (desarrollo)
-                print("[OCR DEBUG] Usando credenciales de Google Cloud desde archivo local")
-                os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = str(credentials_path)
-            else:
-                print("[OCR DEBUG] Credenciales de Google Cloud no encontradas")
+            # Las credenciales se configuran una sola vez al iniciar la app (AiSecurityConfig.ready)
+            if not os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'):
+                logger.debug("Credenciales de Google Cloud no encontradas")
                 return None, 0.0
 
-            print("[OCR DEBUG] Enviando imagen a Google Vision...")
+            logger.debug("Enviando imagen a Google Vision...")
 
-            # Crear cliente de Vision
-            client = vision.ImageAnnotatorClient()
-
-            # Leer imagen
-            with open(image_path, 'rb') as image_file:
-                content = image_file.read()
+            client = _get_vision_client()
 
             image = vision.Image(content=content)
 
@@ -115,43 +106,30 @@ class VehicleOCRService:
             texts = response.text_annotations
 
             if response.error.message:
-                print(f"[OCR DEBUG] Error en Google Vision: {response.error.message}")
+                logger.error("Error en Google Vision: %s", response.error.message)
                 return None, 0.0
 
             if not texts:
-                print("[OCR DEBUG] Google Vision no detectó texto")
+                logger.debug("Google Vision no detectó texto")
                 return None, 0.0
 
             # El primer elemento contiene todo el texto detectado
             detected_text = texts[0].description.strip()
-            print(f"[OCR DEBUG] Google Vision texto completo: '{detected_text}'")
-
-            # Buscar patrones de placas en el texto detectado
-            lines = detected_text.upper().split('\n')
-
-            # Filtrar líneas que podrían ser placas (longitud entre 6-10 caracteres)
-            plate_candidates = []
-            for line in lines:
-                line_clean = re.sub(r'[^\w-]', '', line.strip())
-                if 6 <= len(line_clean) <= 10:
-                    # Verificar si parece una placa boliviana
-                    if (re.match(r'\d{3,4}[A-Z]{2,3}', line_clean) or
-                        re.match(r'\d{3,4}-[A-Z]{2,3}', line_clean) or
-                        re.match(r'[A-Z]{2,3}\d{3}', line_clean)):
-                        plate_candidates.append(line_clean)
-                        print(f"[OCR DEBUG] Candidato de placa: '{line_clean}'")
-
-            # Devolver el mejor candidato
-            if plate_candidates:
-                best_candidate = plate_candidates[0]
-                print(f"[OCR DEBUG] Google Vision detectó placa: '{best_candidate}'")
+            logger.debug("Google Vision texto completo: '%s'", detected_text)
+
+            # Buscar el primer candidato de placa en un único recorrido del texto
+            match = _PLATE_CANDIDATE_RE.search(detected_text.upper())
+            if match:
+                # Unificar el separador leído (espacio o punto) como guión antes de validar
+                best_candidate = VehicleOCRService.normalize_plate(re.sub(r'[\s.]', '-', match.group(0)))
+                logger.debug("Google Vision detectó placa: '%s'", best_candidate)
                 return best_candidate, 90.0  # Alta confianza para Google Vision
 
-            print("[OCR DEBUG] Google Vision no encontró patrones de placa válidos")
+            logger.debug("Google Vision no encontró patrones de placa válidos")
             return None, 0.0
 
         except Exception as e:
-            print(f"[OCR DEBUG] Error con Google Vision: {e}")
+            logger.error("Error con Google Vision: %s", e)
             return None, 0.0
 
     @staticmethod
@@ -164,7 +142,7 @@ class VehicleOCRService:
 
         # Limpiar el texto extraído - remover saltos de línea y espacios extras
         cleaned_text = re.sub(r'\s+', ' ', extracted_text.replace('\n', ' ')).strip().upper()
-        print(f"[OCR DEBUG] Texto limpio para búsqueda: '{cleaned_text}'")
+        logger.debug("Texto limpio para búsqueda: '%s'", cleaned_text)
 
         # Si el texto es corto y parece una placa directa (probable respuesta de OpenAI)
         if len(cleaned_text) <= 15 and (
@@ -173,20 +151,10 @@ class VehicleOCRService:
         ):
             normalized_plate = VehicleOCRService.normalize_plate(cleaned_text)
             confidence = VehicleOCRService.calculate_plate_confidence(normalized_plate)
-            print(f"[OCR DEBUG] Placa detectada directamente: '{normalized_plate}' (probablemente OpenAI)")
+            logger.debug("Placa detectada directamente: '%s' (probablemente OpenAI)", normalized_plate)
             return normalized_plate, confidence
 
-        # Buscar patrones de placas bolivianas estándar
-        for pattern in VehicleOCRService.BOLIVIA_PLATE_PATTERNS:
-            matches = re.findall(pattern, cleaned_text)
-            if matches:
-                raw_plate = matches[0].strip()
-                normalized_plate = VehicleOCRService.normalize_plate(raw_plate)
-                confidence = VehicleOCRService.calculate_plate_confidence(normalized_plate)
-                print(f"[OCR DEBUG] Placa encontrada con patrón estándar: '{normalized_plate}'")
-                return normalized_plate, confidence
-
-        print(f"[OCR DEBUG] No se encontró placa válida en: '{cleaned_text}'")
+        logger.debug("No se encontró placa válida en: '%s'", cleaned_text)
         return None, 0.0
 
     @staticmethod
@@ -213,11 +181,11 @@ class VehicleOCRService:
         Método principal para procesar una imagen de vehículo y extraer la placa.
         """
         try:
-            print(f"[OCR DEBUG] Iniciando procesamiento de imagen: {image_path}")
+            logger.debug("Iniciando procesamiento de imagen: %s", image_path)
 
             # Verificar que el archivo existe
             if not os.path.exists(image_path):
-                print(f"[OCR DEBUG] Error: Archivo no encontrado: {image_path}")
+                logger.error("Error: Archivo no encontrado: %s", image_path)
                 return {
                     'success': False,
                     'error': 'Archivo de imagen no encontrado',
@@ -225,9 +193,45 @@ class VehicleOCRService:
                     'confidence': 0.0
                 }
 
+            with open(image_path, 'rb') as image_file:
+                data = image_file.read()
+
+            return VehicleOCRService.process_vehicle_image_bytes(data)
+
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Error procesando imagen: {str(e)}',
+                'plate': None,
+                'confidence': 0.0
+            }
+
+    @staticmethod
+    def process_vehicle_image_bytes_recent(data):
+        """
+        Igual que process_vehicle_image_bytes, pero reutiliza la lectura exitosa de la misma
+        imagen si se procesó hace menos de RECENT_READ_TIMEOUT segundos.
+        """
+        key = f'ai_security:ocr:{hashlib.sha1(data).hexdigest()}'
+        result = cache.get(key)
+        if result is not None:
+            logger.debug("Reutilizando lectura reciente: '%s'", result['plate'])
+            return result
+
+        result = VehicleOCRService.process_vehicle_image_bytes(data)
+        if result['success']:
+            cache.set(key, result, RECENT_READ_TIMEOUT)
+        return result
+
+    @staticmethod
+    def process_vehicle_image_bytes(data):
+        """
+        Procesa los bytes de una imagen de vehículo y extrae la placa, sin pasar por disco.
+        """
+        try:
             # Usar Google Vision para reconocimiento de placas
             if not GOOGLE_VISION_AVAILABLE:
-                print("[OCR DEBUG] Error: Google Vision no está disponible")
+                logger.error("Error: Google Vision no está disponible")
                 return {
                     'success': False,
                     'error': 'Servicio de reconocimiento no disponible. Google Vision no configurado.',
@@ -235,11 +239,11 @@ class VehicleOCRService:
                     'confidence': 0.0
                 }
 
-            print("[OCR DEBUG] Usando Google Vision para reconocimiento...")
-            extracted_text, ocr_confidence = VehicleOCRService.extract_text_with_google_vision(image_path)
+            logger.debug("Usando Google Vision para reconocimiento...")
+            extracted_text, ocr_confidence = VehicleOCRService.extract_text_with_google_vision_bytes(data)
 
             if not extracted_text:
-                print("[OCR DEBUG] Google Vision no pudo detectar placa")
+                logger.debug("Google Vision no pudo detectar placa")
                 return {
                     'success': False,
                     'error': 'No se pudo detectar placa en la imagen',
@@ -249,10 +253,10 @@ class VehicleOCRService:
 
             # Detectar placa en el texto extraído
             plate, plate_confidence = VehicleOCRService.detect_license_plate(extracted_text)
-            print(f"[OCR DEBUG] Placa detectada: '{plate}', confianza: {plate_confidence}")
+            logger.debug("Placa detectada: '%s', confianza: %s", plate, plate_confidence)
 
             if not plate:
-                print(f"[OCR DEBUG] No se detectó placa boliviana válida en: '{extracted_text}'")
+                logger.debug("No se detectó placa boliviana válida en: '%s'", extracted_text)
                 return {
                     'success': False,
                     'error': 'No se detectó ninguna placa boliviana válida',
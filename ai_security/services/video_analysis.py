@@ -5,11 +5,23 @@ Detecta actividades sospechosas, accidentes vehiculares y animales sueltos.
 
 import boto3
 import json
+import logging
 import time
+from functools import lru_cache
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
 from ..models import AnalisisVideo, DeteccionActividad, TipoActividad
+from ..tasks import encolar, generar_aviso_actividad_task
+
+logger = logging.getLogger(__name__)
+
+# Etiquetas por página al leer los resultados de get_label_detection
+LABELS_PAGE_SIZE = 1000
+
+# Nombres de etiqueta distintos cuya clasificación se recuerda (el servicio vive todo el proceso)
+LABEL_CATEGORIAS_CACHE_SIZE = 1024
 
 
 class VideoAnalysisService:
@@ -42,56 +54,121 @@ class VideoAnalysisService:
             }
         }
 
+        # Índice de palabras clave en minúsculas -> categorías, para clasificar etiquetas
+        self._keyword_index = {}
+        for categoria, config in self.detection_configs.items():
+            for keyword in config['labels']:
+                self._keyword_index.setdefault(keyword.lower(), []).append(categoria)
+        self._min_conf = {
+            categoria: config['min_confidence']
+            for categoria, config in self.detection_configs.items()
+        }
+        # Categorías ya resueltas por nombre de etiqueta (Rekognition repite las mismas),
+        # acotadas para que el singleton no crezca sin límite
+        self._categorias_por_etiqueta = lru_cache(maxsize=LABEL_CATEGORIAS_CACHE_SIZE)(
+            self._resolver_categorias
+        )
+
     def iniciar_analisis(self, camera_id: str, video_name: str, video_url: str, usuario) -> AnalisisVideo:
         """
         Inicia el análisis de un video con Amazon Rekognition
         """
         try:
-            # Crear registro de análisis
-            analisis = AnalisisVideo.objects.create(
-                camera_id=camera_id,
-                video_name=video_name,
-                video_url=video_url,
-                usuario=usuario,
-                estado='PENDIENTE'
-            )
+            analisis = self.crear_analisis(camera_id, video_name, video_url, usuario)
+            return self.iniciar_job(analisis)
 
-            # Extraer bucket y key del video_url
-            bucket_name = settings.AWS_S3_BUCKET_NAME
-            video_key = f"{camera_id}/{video_name}"
-
-            # Iniciar análisis de etiquetas con Rekognition
-            try:
-                response = self.rekognition.start_label_detection(
-                    Video={
-                        'S3Object': {
-                            'Bucket': bucket_name,
-                            'Name': video_key
-                        }
-                    },
-                    MinConfidence=60.0,  # Confianza mínima para todas las detecciones
-                    Features=['GENERAL_LABELS'],
-                    JobTag=f"analysis_{analisis.id}"
-                )
+        except Exception as e:
+            logger.error("Error iniciando análisis: %s", e)
+            raise
+
+    def crear_analisis(self, camera_id: str, video_name: str, video_url: str, usuario) -> AnalisisVideo:
+        """
+        Crea el registro del análisis en estado PENDIENTE, sin llamar a Rekognition
+        """
+        return AnalisisVideo.objects.create(
+            camera_id=camera_id,
+            video_name=video_name,
+            video_url=video_url,
+            usuario=usuario,
+            estado='PENDIENTE'
+        )
+
+    def iniciar_job(self, analisis: AnalisisVideo) -> AnalisisVideo:
+        """
+        Inicia el job de Rekognition de un análisis PENDIENTE y lo deja en PROCESANDO
+        """
+        # Extraer bucket y key del video_url
+        bucket_name = settings.AWS_S3_BUCKET_NAME
+        video_key = f"{analisis.camera_id}/{analisis.video_name}"
 
-                # Guardar job ID y actualizar estado
-                analisis.job_id = response['JobId']
-                analisis.estado = 'PROCESANDO'
-                analisis.save()
+        # Iniciar análisis de etiquetas con Rekognition
+        try:
+            params = {
+                'Video': {
+                    'S3Object': {
+                        'Bucket': bucket_name,
+                        'Name': video_key
+                    }
+                },
+                'MinConfidence': 60.0,  # Confianza mínima para todas las detecciones
+                'Features': ['GENERAL_LABELS'],
+                'JobTag': f"analysis_{analisis.id}"
+            }
 
-                print(f"Análisis iniciado - Job ID: {response['JobId']}")
-                return analisis
+            # Si hay tópico SNS configurado, Rekognition avisa al terminar y no hace falta consultar
+            notification_channel = self._notification_channel()
+            if notification_channel:
+                params['NotificationChannel'] = notification_channel
 
-            except Exception as rekognition_error:
-                analisis.estado = 'ERROR'
-                analisis.error_mensaje = f"Error en Rekognition: {str(rekognition_error)}"
-                analisis.save()
-                raise
+            response = self.rekognition.start_label_detection(**params)
 
-        except Exception as e:
-            print(f"Error iniciando análisis: {e}")
+            # Guardar job ID y actualizar estado
+            analisis.job_id = response['JobId']
+            analisis.estado = 'PROCESANDO'
+            analisis.save()
+
+            logger.info("Análisis iniciado - Job ID: %s", response['JobId'])
+            return analisis
+
+        except Exception as rekognition_error:
+            analisis.estado = 'ERROR'
+            analisis.error_mensaje = f"Error en Rekognition: {str(rekognition_error)}"
+            analisis.save()
             raise
 
+    @staticmethod
+    def _notification_channel() -> Optional[Dict[str, str]]:
+        """
+        Canal SNS para que Rekognition notifique el fin del análisis, si está configurado
+        """
+        topic_arn = getattr(settings, 'REKOGNITION_SNS_TOPIC_ARN', None)
+        role_arn = getattr(settings, 'REKOGNITION_ROLE_ARN', None)
+        if not topic_arn or not role_arn:
+            return None
+        return {'SNSTopicArn': topic_arn, 'RoleArn': role_arn}
+
+    def confirmar_suscripcion_sns(self, topic_arn: str, token: str) -> None:
+        """
+        Confirma la suscripción HTTP(S) del endpoint de notificaciones al tópico SNS
+        """
+        sns = boto3.client(
+            'sns',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_DEFAULT_REGION
+        )
+        sns.confirm_subscription(TopicArn=topic_arn, Token=token)
+
+    def procesar_notificacion(self, job_id: str) -> bool:
+        """
+        Procesa la notificación SNS de fin de un trabajo de Rekognition
+        """
+        analisis = AnalisisVideo.objects.filter(job_id=job_id, estado='PROCESANDO').first()
+        if not analisis:
+            return False
+
+        return self.verificar_estado_analisis(analisis)
+
     def verificar_estado_analisis(self, analisis: AnalisisVideo) -> bool:
         """
         Verifica el estado del análisis en Rekognition y procesa resultados si está completo
@@ -100,139 +177,180 @@ class VideoAnalysisService:
             return False
 
         try:
-            response = self.rekognition.get_label_detection(JobId=analisis.job_id)
+            response = self.rekognition.get_label_detection(
+                JobId=analisis.job_id,
+                MaxResults=LABELS_PAGE_SIZE
+            )
             job_status = response['JobStatus']
 
             if job_status == 'SUCCEEDED':
-                # Procesar resultados
-                self._procesar_resultados(analisis, response)
-                analisis.estado = 'COMPLETADO'
-                analisis.completado_at = timezone.now()
-                analisis.save()
-                return True
+                # Procesar resultados página por página; solo gana quien reclame el análisis
+                return self._procesar_resultados(analisis, self._paginas_resultados(analisis.job_id, response))
 
             elif job_status == 'FAILED':
-                analisis.estado = 'ERROR'
-                analisis.error_mensaje = response.get('StatusMessage', 'Análisis falló en Rekognition')
-                analisis.save()
+                self._marcar_error(analisis, response.get('StatusMessage', 'Análisis falló en Rekognition'))
                 return False
 
             # Aún procesando
             return False
 
         except Exception as e:
-            analisis.estado = 'ERROR'
-            analisis.error_mensaje = f"Error verificando estado: {str(e)}"
-            analisis.save()
+            self._marcar_error(analisis, f"Error verificando estado: {str(e)}")
             return False
 
-    def _procesar_resultados(self, analisis: AnalisisVideo, rekognition_response: Dict) -> None:
+    @staticmethod
+    def _marcar_error(analisis: AnalisisVideo, mensaje: str) -> None:
         """
-        Procesa los resultados de Rekognition y crea detecciones de actividades
+        Marca el análisis como ERROR solo si sigue PROCESANDO, sin pisar a otro proceso que ya lo completó
         """
-        labels = rekognition_response.get('Labels', [])
-        detecciones_creadas = 0
-        confianzas = []
+        actualizados = AnalisisVideo.objects.filter(pk=analisis.pk, estado='PROCESANDO').update(
+            estado='ERROR',
+            error_mensaje=mensaje
+        )
+        if actualizados:
+            analisis.estado = 'ERROR'
+            analisis.error_mensaje = mensaje
 
-        print(f"Procesando {len(labels)} etiquetas detectadas")
+    def _paginas_resultados(self, job_id: str, primera_pagina: Dict) -> Iterator[Dict]:
+        """
+        Recorre las páginas de get_label_detection reutilizando la primera respuesta ya obtenida
+        """
+        response = primera_pagina
+        yield response
+
+        while response.get('NextToken'):
+            response = self.rekognition.get_label_detection(
+                JobId=job_id,
+                MaxResults=LABELS_PAGE_SIZE,
+                NextToken=response['NextToken']
+            )
+            yield response
+
+    def _procesar_resultados(self, analisis: AnalisisVideo, paginas: Iterable[Dict]) -> bool:
+        """
+        Procesa los resultados de Rekognition y crea detecciones de actividades.
+        Devuelve False si otro proceso (reentrega SNS o verificar_pendientes) ya reclamó el análisis.
+        """
+        confianzas = []
+        total_labels = 0
 
         # Agrupar labels por timestamp para crear detecciones
         detecciones_por_timestamp = {}
 
-        for label_data in labels:
+        for label_data in (label for pagina in paginas for label in pagina.get('Labels', [])):
+            total_labels += 1
             label_name = label_data['Label']['Name']
             confidence = label_data['Label']['Confidence']
             timestamp = label_data['Timestamp'] / 1000.0  # Convertir de ms a segundos
 
             # Verificar qué categorías coinciden con esta etiqueta
-            categorias_detectadas = self._clasificar_etiqueta(label_name, confidence)
+            categorias_detectadas = self._clasificar_etiqueta(label_name)
 
             for categoria in categorias_detectadas:
                 # Crear o actualizar detección para esta categoría y timestamp
-                key = f"{categoria}_{int(timestamp)}"
+                key = (categoria, int(timestamp))
                 if key not in detecciones_por_timestamp:
                     detecciones_por_timestamp[key] = {
                         'categoria': categoria,
                         'timestamp_inicio': timestamp,
                         'timestamp_fin': timestamp,
-                        'objetos': [],
-                        'confianzas': [],
+                        'objetos': set(),
+                        'conf_sum': 0.0,
+                        'conf_count': 0,
                         'bounding_boxes': []
                     }
 
-                detecciones_por_timestamp[key]['timestamp_fin'] = max(
-                    detecciones_por_timestamp[key]['timestamp_fin'],
-                    timestamp
-                )
-                detecciones_por_timestamp[key]['objetos'].append(label_name)
-                detecciones_por_timestamp[key]['confianzas'].append(confidence)
-
-        # Crear detecciones en la base de datos
-        for deteccion_data in detecciones_por_timestamp.values():
-            categoria = deteccion_data['categoria']
-
-            # Obtener o crear tipo de actividad
-            tipo_actividad, created = TipoActividad.objects.get_or_create(
-                categoria=categoria,
-                nombre=self.detection_configs[categoria]['description'],
-                defaults={
-                    'descripcion': self.detection_configs[categoria]['description'],
-                    'palabras_clave': ','.join(self.detection_configs[categoria]['labels'])
-                }
+                d = detecciones_por_timestamp[key]
+                if timestamp > d['timestamp_fin']:
+                    d['timestamp_fin'] = timestamp
+                d['objetos'].add(label_name)
+                d['conf_sum'] += confidence
+                d['conf_count'] += 1
+
+        logger.debug("Procesadas %s etiquetas detectadas", total_labels)
+
+        with transaction.atomic():
+            # Reclamar el análisis con un UPDATE condicional: el lock de la fila se mantiene
+            # hasta el commit, así que un segundo proceso concurrente no actualiza ninguna fila
+            completado_at = timezone.now()
+            reclamado = AnalisisVideo.objects.filter(pk=analisis.pk, estado='PROCESANDO').update(
+                estado='COMPLETADO',
+                completado_at=completado_at
             )
-
-            # Calcular confianza promedio
-            confianza_promedio = sum(deteccion_data['confianzas']) / len(deteccion_data['confianzas'])
-
-            if confianza_promedio >= self.detection_configs[categoria]['min_confidence']:
-                # Crear detección
-                deteccion = DeteccionActividad.objects.create(
-                    analisis=analisis,
-                    tipo_actividad=tipo_actividad,
-                    timestamp_inicio=deteccion_data['timestamp_inicio'],
-                    timestamp_fin=deteccion_data['timestamp_fin'],
-                    confianza=confianza_promedio,
-                    objetos_detectados=list(set(deteccion_data['objetos'])),  # Eliminar duplicados
-                    bounding_boxes=deteccion_data['bounding_boxes']
+            if not reclamado:
+                logger.info("Análisis %s ya fue procesado por otro proceso", analisis.pk)
+                return False
+            analisis.estado = 'COMPLETADO'
+            analisis.completado_at = completado_at
+
+            # Obtener o crear una sola vez el tipo de actividad de cada categoría presente
+            tipo_cache = {}
+            for categoria in {d['categoria'] for d in detecciones_por_timestamp.values()}:
+                tipo_cache[categoria], _ = TipoActividad.objects.get_or_create(
+                    categoria=categoria,
+                    nombre=self.detection_configs[categoria]['description'],
+                    defaults={
+                        'descripcion': self.detection_configs[categoria]['description'],
+                        'palabras_clave': ','.join(self.detection_configs[categoria]['labels'])
+                    }
                 )
 
-                detecciones_creadas += 1
-                confianzas.append(confianza_promedio)
-
-                print(f"Detección creada: {tipo_actividad.nombre} - {confianza_promedio:.1f}% confianza")
-
-                # Generar aviso automático para detecciones de alta confianza
-                if confianza_promedio >= 80.0:  # Solo para detecciones muy confiables
-                    try:
-                        aviso_id = self.generar_aviso_actividad(deteccion)
-                        if aviso_id:
-                            print(f"Aviso automático generado para detección {deteccion.id}")
-                    except Exception as e:
-                        print(f"Error generando aviso automático: {e}")
+            # Preparar detecciones sin guardarlas todavía
+            to_create = []
+            for deteccion_data in detecciones_por_timestamp.values():
+                categoria = deteccion_data['categoria']
+
+                # Calcular confianza promedio
+                confianza_promedio = deteccion_data['conf_sum'] / deteccion_data['conf_count']
+
+                if confianza_promedio >= self._min_conf[categoria]:
+                    to_create.append(DeteccionActividad(
+                        analisis=analisis,
+                        tipo_actividad=tipo_cache[categoria],
+                        timestamp_inicio=deteccion_data['timestamp_inicio'],
+                        timestamp_fin=deteccion_data['timestamp_fin'],
+                        confianza=confianza_promedio,
+                        objetos_detectados=list(deteccion_data['objetos']),
+                        bounding_boxes=deteccion_data['bounding_boxes']
+                    ))
+                    confianzas.append(confianza_promedio)
+
+            # Insertar todas las detecciones en lote
+            created = DeteccionActividad.objects.bulk_create(to_create, batch_size=500)
+            detecciones_creadas = len(created)
+
+            # Actualizar estadísticas del análisis
+            analisis.actividades_detectadas = detecciones_creadas
+            if confianzas:
+                analisis.confianza_promedio = sum(confianzas) / len(confianzas)
+            analisis.save()
 
-        # Actualizar estadísticas del análisis
-        analisis.actividades_detectadas = detecciones_creadas
-        if confianzas:
-            analisis.confianza_promedio = sum(confianzas) / len(confianzas)
-        analisis.save()
+            # Generar aviso automático para detecciones de alta confianza, fuera del request
+            for deteccion in created:
+                if deteccion.confianza >= 80.0:  # Solo para detecciones muy confiables
+                    encolar(generar_aviso_actividad_task, deteccion.id)
 
-        print(f"Análisis completado: {detecciones_creadas} actividades detectadas")
+        logger.info("Análisis completado: %s actividades detectadas", detecciones_creadas)
+        return True
 
-    def _clasificar_etiqueta(self, label_name: str, confidence: float) -> List[str]:
+    def _clasificar_etiqueta(self, label_name: str) -> Tuple[str, ...]:
         """
-        Clasifica una etiqueta en las categorías de actividades que detectamos
+        Clasifica una etiqueta en las categorías de actividades que detectamos.
+        La confianza mínima se aplica después, sobre el promedio de cada detección.
         """
-        categorias = []
+        return self._categorias_por_etiqueta(label_name.lower())
 
-        for categoria, config in self.detection_configs.items():
-            # Verificar si la etiqueta coincide con alguna de las palabras clave
-            for keyword in config['labels']:
-                if keyword.lower() in label_name.lower():
-                    if confidence >= config['min_confidence']:
-                        categorias.append(categoria)
-                    break
-
-        return categorias
+    def _resolver_categorias(self, ln: str) -> Tuple[str, ...]:
+        """
+        Categorías cuyas palabras clave aparecen en la etiqueta ya en minúsculas
+        """
+        candidatas = []
+        for keyword, categorias_kw in self._keyword_index.items():
+            if keyword in ln:
+                for categoria in categorias_kw:
+                    if categoria not in candidatas:
+                        candidatas.append(categoria)
+        return tuple(candidatas)
 
     def obtener_analisis_pendientes(self) -> List[AnalisisVideo]:
         """
@@ -251,7 +369,7 @@ class VideoAnalysisService:
             # Obtener admin del sistema para crear el aviso
             admin_user = User.objects.filter(is_superuser=True).first()
             if not admin_user:
-                print("No se encontró usuario administrador para crear aviso")
+                logger.warning("No se encontró usuario administrador para crear aviso")
                 return None
 
             # Crear título y contenido del aviso
@@ -288,14 +406,28 @@ Este aviso fue generado automáticamente por el sistema de IA de seguridad.
                 tipo='SEGURIDAD'
             )
 
-            # Marcar que se generó el aviso
+            # Marcar que se generó el aviso con un único UPDATE
+            DeteccionActividad.objects.filter(pk=deteccion.pk).update(
+                aviso_generado=True,
+                aviso_id=aviso.id
+            )
             deteccion.aviso_generado = True
             deteccion.aviso_id = aviso.id
-            deteccion.save()
 
-            print(f"Aviso generado: {titulo}")
+            logger.info("Aviso generado: %s", titulo)
             return aviso.id
 
         except Exception as e:
-            print(f"Error generando aviso: {e}")
-            return None
\ No newline at end of file
+            logger.error("Error generando aviso: %s", e)
+            return None
+
+
+@lru_cache(maxsize=1)
+def get_video_analysis_service() -> VideoAnalysisService:
+    """
+    Devuelve el servicio compartido por el proceso.
+
+    El cliente de Rekognition es thread-safe y el resto del estado del servicio es
+    configuración fija o una caché de etiquetas, así que se reutiliza entre requests y tareas.
+    """
+    return VideoAnalysisService()
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import FacialAccessLog, PersonProfile, TipoActividad, Vehicle
+from .services.vehicle_cache import invalidate_vehicle
+
+# Clave de las estadísticas de reconocimiento facial cacheadas en FacialRecognitionViewSet.stats
+FACIAL_STATS_CACHE_KEY = 'ai_security:facial_stats'
+
+# Clave de la lista de tipos de actividad activos (ActividadSospechosaViewSet.tipos_actividad)
+TIPOS_ACTIVIDAD_CACHE_KEY = 'ai_security:tipos_actividad:v1'
+
+
+@receiver(pre_save, sender=Vehicle)
+def vehicle_pre_save(sender, instance, **kwargs):
+    """
+    Recordar la placa guardada antes del cambio, para invalidarla también si se renombra
+    """
+    if instance.pk:
+        instance._placa_anterior = (
+            Vehicle.objects.filter(pk=instance.pk).values_list('placa', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def vehicle_changed(sender, instance, **kwargs):
+    """
+    Invalidar la caché de la placa cuando se crea, modifica o elimina un vehículo
+    """
+    invalidate_vehicle(instance.placa)
+
+    placa_anterior = getattr(instance, '_placa_anterior', None)
+    if placa_anterior and placa_anterior != instance.placa:
+        invalidate_vehicle(placa_anterior)
+
+
+@receiver(post_save, sender=PersonProfile)
+@receiver(post_delete, sender=PersonProfile)
+@receiver(post_save, sender=FacialAccessLog)
+@receiver(post_delete, sender=FacialAccessLog)
+def facial_stats_changed(sender, instance, **kwargs):
+    """
+    Invalidar las estadísticas faciales cuando cambian perfiles o logs de acceso
+    """
+    cache.delete(FACIAL_STATS_CACHE_KEY)
+
+
+@receiver(post_save, sender=TipoActividad)
+@receiver(post_delete, sender=TipoActividad)
+def tipo_actividad_changed(sender, instance, **kwargs):
+    """
+    Invalidar la lista cacheada de tipos de actividad
+    """
+    cache.delete(TIPOS_ACTIVIDAD_CACHE_KEY)
@@ -0,0 +1,91 @@
+"""
+Tareas en segundo plano de ai_security.
+
+No hay broker de colas en el despliegue, así que las tareas se ejecutan en un
+pool de hilos del propio proceso y se encolan solo después del commit de la
+transacción en curso, para que vean los datos ya persistidos.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ai-security')
+
+
+def _ejecutar(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Error en tarea en segundo plano %s", func.__name__)
+    finally:
+        # Cada hilo abre su propia conexión; se libera al terminar la tarea
+        close_old_connections()
+
+
+def encolar(func, *args, **kwargs):
+    """
+    Ejecuta func(*args, **kwargs) en segundo plano tras el commit de la transacción actual.
+    """
+    transaction.on_commit(lambda: _executor.submit(_ejecutar, func, *args, **kwargs))
+
+
+def generar_aviso_actividad_task(deteccion_id):
+    """
+    Genera el aviso automático de una detección de actividad.
+    """
+    from .models import DeteccionActividad
+    from .services.video_analysis import get_video_analysis_service
+
+    deteccion = DeteccionActividad.objects.select_related('analisis', 'tipo_actividad').get(pk=deteccion_id)
+    aviso_id = get_video_analysis_service().generar_aviso_actividad(deteccion)
+    if aviso_id:
+        logger.info("Aviso automático generado para detección %s", deteccion_id)
+    return aviso_id
+
+
+def iniciar_analisis_task(analisis_id):
+    """
+    Inicia en Rekognition el job de un análisis de video creado en estado PENDIENTE.
+    """
+    from .models import AnalisisVideo
+    from .services.video_analysis import get_video_analysis_service
+
+    analisis = AnalisisVideo.objects.get(pk=analisis_id)
+    get_video_analysis_service().iniciar_job(analisis)
+    return analisis_id
+
+
+def procesar_placa_task(access_log_id, image_data, image_name):
+    """
+    Ejecuta el OCR de una placa encolada y completa su log de acceso.
+    """
+    from django.core.files.base import ContentFile
+
+    from .models import VehicleAccessLog
+    from .services.vehicle_access import evaluar_acceso_vehicular
+    from .services.vehicle_ocr import VehicleOCRService
+
+    try:
+        ocr_result = VehicleOCRService.process_vehicle_image_bytes_recent(image_data)
+        detected_plate, vehicle, resultado, _ = evaluar_acceso_vehicular(ocr_result)
+
+        access_log = VehicleAccessLog.objects.get(pk=access_log_id)
+        access_log.vehicle = vehicle
+        access_log.placa_detectada = detected_plate
+        access_log.confianza_ocr = ocr_result.get('confidence', 0.0)
+        access_log.resultado = resultado
+        if ocr_result['success']:
+            # La imagen solo se persiste cuando el OCR reconoció una placa
+            access_log.imagen = ContentFile(image_data, name=image_name)
+        access_log.save()
+    except Exception:
+        logger.exception("Error procesando la placa del log de acceso %s", access_log_id)
+        # Sacar el log de 'procesando' para que el cliente deje de consultar su estado
+        VehicleAccessLog.objects.filter(pk=access_log_id, resultado='procesando').update(
+            resultado='desconocido'
+        )
+    return access_log_id
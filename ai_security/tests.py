@@ -1,3 +1,28 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.users.models import User
+
+from .signals import FACIAL_STATS_CACHE_KEY
+
+
+class FacialRecognitionStatsTests(TestCase):
+    """
+    Estadísticas de reconocimiento facial (FacialRecognitionViewSet.stats).
+    """
+
+    def setUp(self):
+        cache.delete(FACIAL_STATS_CACHE_KEY)
+        self.user = User.objects.create_user(username='guardia', password='clave-segura-123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_stats_devuelve_conteos(self):
+        response = self.client.get(reverse('ai_security:facial-recognition-stats'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['success'])
+        self.assertEqual(response.data['stats']['total_profiles'], 0)
+        self.assertEqual(response.data['stats']['monthly_stats']['total_attempts'], 0)
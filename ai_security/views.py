@@ -1,11 +1,17 @@
-import os
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from functools import lru_cache
 from django.utils import timezone
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db import transaction
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.core.files.storage import default_storage
+from rest_framework.pagination import CursorPagination
 from django.core.files.base import ContentFile
 from django.conf import settings
 import boto3
@@ -19,6 +25,7 @@ from .serializers import (
     VehicleSerializer,
     VehicleAccessLogSerializer,
     VehicleOCRRequestSerializer,
+    VehicleOCRBulkRequestSerializer,
     VehicleOCRResponseSerializer,
     VehicleOCRTrainingSerializer,
     PersonProfileSerializer,
@@ -32,12 +39,132 @@ from .serializers import (
     EstadisticasAnalisisSerializer
 )
 from .services.vehicle_ocr import VehicleOCRService
-from .services.aws_facial_recognition import AWSFacialRecognitionService
+from .services.vehicle_access import evaluar_acceso_vehicular
+from .signals import FACIAL_STATS_CACHE_KEY
+from .tasks import encolar, procesar_placa_task
+from .services.aws_facial_recognition import get_facial_recognition_service
 from .services.video_analysis import VideoAnalysisService
 from .views_actividadsospechosa import ActividadSospechosaViewSet
 
+FACIAL_STATS_CACHE_TIMEOUT = 60  # segundos
+
+# Segundos durante los que un reenvío del mismo formulario no registra otra persona
+REGISTRATION_DEDUPE_TIMEOUT = 60
+
+# Valor de la clave de deduplicación mientras el primer envío sigue registrando la cara
+REGISTRATION_IN_PROGRESS = 'en_curso'
+
+# Hilos para las llamadas a Google Vision de un mismo lote de imágenes
+BULK_OCR_WORKERS = 4
+
+# Los videos se vuelven a listar antes de que expiren sus URLs firmadas (1 hora)
+VIDEO_LIST_CACHE_TIMEOUT = 300  # segundos
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov')
+
+PRESIGNED_URL_EXPIRES_IN = 3600  # segundos
+# Menor que la validez de la URL, para no entregar una a punto de expirar
+PRESIGNED_URL_CACHE_TIMEOUT = 3000  # segundos
+
+# Respuestas fijas de los endpoints test_service
+OCR_SERVICE_INFO = {
+    'message': 'Servicio OCR de placas vehiculares funcionando',
+    'version': '1.0.0',
+    'supported_formats': ['JPEG', 'PNG', 'BMP'],
+    'max_file_size': '10MB'
+}
+
+FACIAL_SERVICE_INFO = {
+    'message': 'Servicio de reconocimiento facial funcionando',
+    'version': '1.0.0',
+    'supported_formats': ['JPEG', 'PNG', 'BMP'],
+    'max_file_size': '10MB',
+    'features': [
+        'Identificación de personas',
+        'Registro de nuevos perfiles',
+        'Control de acceso automatizado',
+        'Logs de acceso detallados'
+    ]
+}
+
+CAMERAS = [
+    {
+        'id': 'camara1',
+        'name': 'Cámara 1',
+        'description': 'Cámara de entrada principal',
+        'location': 'Entrada Principal'
+    },
+    {
+        'id': 'camara2',
+        'name': 'Cámara 2',
+        'description': 'Cámara de garaje',
+        'location': 'Garaje'
+    },
+    {
+        'id': 'camara3',
+        'name': 'Cámara 3',
+        'description': 'Cámara de área común',
+        'location': 'Área Común'
+    }
+]
+
+
+@lru_cache(maxsize=1)
+def _s3_client():
+    """
+    Crear una sola vez el cliente S3; los clientes de boto3 son thread-safe.
+    """
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_DEFAULT_REGION
+    )
+
+
+def _vehicle_to_dict(vehicle):
+    """
+    Representación de vehicle_info equivalente a VehicleSerializer, sin construir el serializer.
+    """
+    return {
+        'id': vehicle.id,
+        'user': vehicle.user_id,
+        'user_name': vehicle.user.get_full_name(),
+        'placa': vehicle.placa,
+        'color': vehicle.color,
+        'modelo': vehicle.modelo,
+        'marca': vehicle.marca,
+        'is_active': vehicle.is_active,
+        'created_at': timezone.localtime(vehicle.created_at).isoformat(),
+        'updated_at': timezone.localtime(vehicle.updated_at).isoformat(),
+    }
+
+
+class DynamicFieldsViewMixin:
+    """
+    Lee ``?fields=a,b,c`` en las lecturas y lo pasa al serializer para devolver solo esos campos.
+    """
+
+    def get_requested_fields(self):
+        if self.request.method not in ('GET', 'HEAD'):
+            return None
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return None
+        return [field.strip() for field in fields.split(',') if field.strip()]
 
-class VehicleViewSet(viewsets.ModelViewSet):
+    def wants_field(self, field_name):
+        fields = self.get_requested_fields()
+        return fields is None or field_name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class VehicleViewSet(DynamicFieldsViewMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de vehículos registrados.
     """
@@ -50,6 +177,8 @@ class VehicleViewSet(viewsets.ModelViewSet):
         Filtrar vehículos por usuario actual si no es admin.
         """
         queryset = Vehicle.objects.all()
+        if self.wants_field('user_name'):
+            queryset = queryset.select_related('user')
 
         # Si no es superuser, solo mostrar sus vehículos
         if not self.request.user.is_superuser:
@@ -65,23 +194,38 @@ class VehicleViewSet(viewsets.ModelViewSet):
         Obtener vehículos del usuario actual.
         """
         vehicles = Vehicle.objects.filter(user=request.user, is_active=True)
+        if self.wants_field('user_name'):
+            vehicles = vehicles.select_related('user')
         serializer = self.get_serializer(vehicles, many=True)
         return Response(serializer.data)
 
 
-class VehicleAccessLogViewSet(viewsets.ReadOnlyModelViewSet):
+class TimestampCursorPagination(CursorPagination):
+    """
+    Paginación por cursor sobre timestamp_evento: cada página es una búsqueda por índice,
+    sin OFFSET ni COUNT(*) sobre todo el historial.
+    """
+    ordering = '-timestamp_evento'
+    page_size = 50
+
+
+class VehicleAccessLogViewSet(DynamicFieldsViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para logs de acceso vehicular (solo lectura).
     """
     queryset = VehicleAccessLog.objects.all()
     serializer_class = VehicleAccessLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TimestampCursorPagination
 
     def get_queryset(self):
         """
         Filtrar logs según permisos del usuario.
         """
         queryset = VehicleAccessLog.objects.all()
+        # vehicle_info serializa el vehículo y el nombre de su dueño
+        if self.wants_field('vehicle_info'):
+            queryset = queryset.select_related('vehicle__user')
 
         # Si no es superuser, solo mostrar logs de sus vehículos
         if not self.request.user.is_superuser:
@@ -113,43 +257,22 @@ class VehicleOCRViewSet(viewsets.GenericViewSet):
             # Obtener imagen del request
             imagen = request_serializer.validated_data['imagen']
 
-            # Guardar imagen temporalmente
-            temp_path = default_storage.save(
-                f'temp/vehicle_ocr/{imagen.name}',
-                ContentFile(imagen.read())
-            )
-            full_temp_path = os.path.join(settings.MEDIA_ROOT, temp_path)
-
-            # Procesar imagen con OCR
-            ocr_result = VehicleOCRService.process_vehicle_image(full_temp_path)
+            # Procesar la imagen en memoria: Google Vision recibe los bytes directamente
+            image_data = imagen.read()
+            ocr_result = VehicleOCRService.process_vehicle_image_bytes_recent(image_data)
 
             # Buscar vehículo registrado si se detectó placa
-            vehicle_info = None
-            resultado = 'desconocido'
-            message = 'No se detectó placa válida'
-
-            detected_plate = ocr_result.get('plate') or ''  # Asegurar que nunca sea None
-
-            if ocr_result['success'] and detected_plate:
-                try:
-                    vehicle = Vehicle.objects.get(
-                        placa=detected_plate,
-                        is_active=True
-                    )
-                    vehicle_info = VehicleSerializer(vehicle).data
-                    resultado = 'autorizado'
-                    message = f"Vehículo autorizado - {vehicle.user.get_full_name()}"
-                except Vehicle.DoesNotExist:
-                    resultado = 'denegado'
-                    message = f"Vehículo no autorizado - Placa: {detected_plate}"
+            detected_plate, vehicle, resultado, message = evaluar_acceso_vehicular(ocr_result)
+            vehicle_info = _vehicle_to_dict(vehicle) if resultado == 'autorizado' else None
 
             # Crear log de acceso
             access_log = VehicleAccessLog.objects.create(
-                vehicle=Vehicle.objects.filter(placa=detected_plate).first() if detected_plate else None,
+                vehicle=vehicle,
                 placa_detectada=detected_plate,
                 confianza_ocr=ocr_result.get('confidence', 0.0),
                 resultado=resultado,
-                imagen=temp_path
+                # La imagen solo se persiste cuando el OCR reconoció una placa
+                imagen=ContentFile(image_data, name=imagen.name) if ocr_result['success'] else None
             )
 
             # Preparar respuesta
@@ -177,13 +300,130 @@ class VehicleOCRViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        finally:
-            # Limpiar archivo temporal
-            try:
-                if 'full_temp_path' in locals() and os.path.exists(full_temp_path):
-                    os.remove(full_temp_path)
-            except:
-                pass
+    @action(detail=False, methods=['post'])
+    def bulk_recognize(self, request):
+        """
+        Reconocer las placas de varias imágenes y registrar todos los logs en un solo INSERT.
+        """
+        request_serializer = VehicleOCRBulkRequestSerializer(data=request.data)
+        if not request_serializer.is_valid():
+            return Response(
+                request_serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            imagenes = request_serializer.validated_data['imagenes']
+            images_data = [imagen.read() for imagen in imagenes]
+
+            # Google Vision es I/O de red: las imágenes del lote se procesan en paralelo
+            with ThreadPoolExecutor(max_workers=BULK_OCR_WORKERS) as executor:
+                ocr_results = list(executor.map(VehicleOCRService.process_vehicle_image_bytes_recent, images_data))
+
+            logs = []
+            results = []
+            for imagen, image_data, ocr_result in zip(imagenes, images_data, ocr_results):
+                detected_plate, vehicle, resultado, message = evaluar_acceso_vehicular(ocr_result)
+                logs.append(VehicleAccessLog(
+                    vehicle=vehicle,
+                    placa_detectada=detected_plate,
+                    confianza_ocr=ocr_result.get('confidence', 0.0),
+                    resultado=resultado,
+                    # La imagen solo se persiste cuando el OCR reconoció una placa
+                    imagen=ContentFile(image_data, name=imagen.name) if ocr_result['success'] else None
+                ))
+                results.append({
+                    'success': ocr_result['success'],
+                    'plate': detected_plate or None,
+                    'confidence': ocr_result.get('confidence', 0.0),
+                    'resultado': resultado,
+                    'message': message,
+                    'vehicle_info': _vehicle_to_dict(vehicle) if resultado == 'autorizado' else None,
+                    'extracted_text': ocr_result.get('extracted_text')
+                })
+
+            with transaction.atomic():
+                VehicleAccessLog.objects.bulk_create(logs, batch_size=500)
+
+            # PostgreSQL devuelve los ids de las filas insertadas por bulk_create
+            for result, access_log in zip(results, logs):
+                result['access_log_id'] = access_log.id
+
+            return Response({
+                'success': True,
+                'count': len(results),
+                'results': results
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            return Response(
+                {
+                    'success': False,
+                    'error': f'Error procesando imágenes: {str(e)}'
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['post'])
+    def recognize_plate_async(self, request):
+        """
+        Encolar el reconocimiento de placa y responder de inmediato con el log a consultar.
+        """
+        request_serializer = VehicleOCRRequestSerializer(data=request.data)
+        if not request_serializer.is_valid():
+            return Response(
+                request_serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            imagen = request_serializer.validated_data['imagen']
+            image_data = imagen.read()
+
+            # El log queda en 'procesando' hasta que la tarea complete el OCR
+            # Quien encola queda guardado en el log: cualquier worker puede responder su consulta
+            access_log = VehicleAccessLog.objects.create(resultado='procesando', solicitado_por=request.user)
+            encolar(procesar_placa_task, access_log.id, image_data, imagen.name)
+
+            return Response({
+                'success': True,
+                'access_log_id': access_log.id,
+                'resultado': access_log.resultado
+            }, status=status.HTTP_202_ACCEPTED)
+
+        except Exception as e:
+            return Response(
+                {
+                    'success': False,
+                    'error': f'Error encolando imagen: {str(e)}'
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=True, methods=['get'])
+    def estado(self, request, pk=None):
+        """
+        Consultar el resultado de un reconocimiento encolado con recognize_plate_async.
+        """
+        queryset = VehicleAccessLog.objects.select_related('vehicle__user')
+
+        # Igual que VehicleAccessLogViewSet: si no es superuser, solo logs de sus vehículos
+        # o el reconocimiento que él mismo encoló
+        if not request.user.is_superuser:
+            queryset = queryset.filter(Q(vehicle__user=request.user) | Q(solicitado_por=request.user))
+
+        try:
+            access_log = queryset.get(pk=pk)
+        except (VehicleAccessLog.DoesNotExist, ValueError):
+            return Response(
+                {'error': 'Log de acceso no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({
+            'completado': access_log.resultado != 'procesando',
+            'access_log': VehicleAccessLogSerializer(access_log, context={'request': request}).data
+        })
 
     @action(detail=False, methods=['post'])
     def train_ocr(self, request):
@@ -210,22 +450,18 @@ class VehicleOCRViewSet(viewsets.GenericViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Verificar si ya existe datos de entrenamiento para este log
-            training_data, created = VehicleOCRTrainingData.objects.get_or_create(
-                access_log=access_log,
-                defaults={
-                    'placa_detectada_original': access_log.placa_detectada,
-                    'placa_correcta': placa_correcta,
-                    'confianza_original': access_log.confianza_ocr,
-                    'usuario_correccion': request.user
-                }
-            )
-
-            if not created:
-                # Actualizar si ya existe
-                training_data.placa_correcta = placa_correcta
-                training_data.usuario_correccion = request.user
-                training_data.save()
+            # Crear o actualizar la corrección de este log; update_or_create bloquea la fila
+            # existente, así dos correcciones concurrentes no se pisan
+            with transaction.atomic():
+                training_data, created = VehicleOCRTrainingData.objects.update_or_create(
+                    access_log=access_log,
+                    defaults={
+                        'placa_detectada_original': access_log.placa_detectada,
+                        'placa_correcta': placa_correcta,
+                        'confianza_original': access_log.confianza_ocr,
+                        'usuario_correccion': request.user
+                    }
+                )
 
             return Response({
                 'success': True,
@@ -248,12 +484,17 @@ class VehicleOCRViewSet(viewsets.GenericViewSet):
         """
         training_data = VehicleOCRTrainingData.objects.all()
 
+        # Los tres conteos en una sola consulta
+        counts = training_data.aggregate(
+            total=Count('id'),
+            unique_plates=Count('placa_correcta', distinct=True),
+            recent=Count('id', filter=Q(created_at__gte=timezone.now() - timedelta(days=30)))
+        )
+
         stats = {
-            'total_corrections': training_data.count(),
-            'unique_plates': training_data.values('placa_correcta').distinct().count(),
-            'recent_corrections': training_data.filter(
-                created_at__gte=timezone.now() - timedelta(days=30)
-            ).count()
+            'total_corrections': counts['total'],
+            'unique_plates': counts['unique_plates'],
+            'recent_corrections': counts['recent']
         }
 
         # Mostrar ejemplos recientes para entrenar
@@ -271,12 +512,7 @@ class VehicleOCRViewSet(viewsets.GenericViewSet):
         """
         Endpoint de prueba para verificar que el servicio OCR funciona.
         """
-        return Response({
-            'message': 'Servicio OCR de placas vehiculares funcionando',
-            'version': '1.0.0',
-            'supported_formats': ['JPEG', 'PNG', 'BMP'],
-            'max_file_size': '10MB'
-        })
+        return Response(OCR_SERVICE_INFO)
 
 
 class PersonProfileViewSet(viewsets.ModelViewSet):
@@ -291,7 +527,8 @@ class PersonProfileViewSet(viewsets.ModelViewSet):
         """
         Filtrar perfiles según permisos del usuario.
         """
-        queryset = PersonProfile.objects.all()
+        # user_name del serializer lee el dueño de cada perfil
+        queryset = PersonProfile.objects.select_related('user')
 
         # Si no es superuser, solo mostrar sus perfiles asociados
         if not self.request.user.is_superuser:
@@ -336,7 +573,7 @@ class PersonProfileViewSet(viewsets.ModelViewSet):
         """
         try:
             profile = self.get_object()
-            aws_service = AWSFacialRecognitionService()
+            aws_service = get_facial_recognition_service()
 
             # Eliminar usando el servicio AWS
             success = aws_service.delete_person_profile(profile)
@@ -366,12 +603,14 @@ class FacialAccessLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = FacialAccessLog.objects.all()
     serializer_class = FacialAccessLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TimestampCursorPagination
 
     def get_queryset(self):
         """
         Filtrar logs según permisos del usuario.
         """
-        queryset = FacialAccessLog.objects.all()
+        # person_info anida el perfil y el nombre de su dueño
+        queryset = FacialAccessLog.objects.select_related('person_profile__user')
 
         # Si no es superuser, solo mostrar logs relacionados a sus perfiles
         if not self.request.user.is_superuser:
@@ -415,17 +654,11 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
             imagen = request_serializer.validated_data['imagen']
             location = request_serializer.validated_data.get('location', 'Entrada Principal')
 
-            # Guardar imagen temporalmente
-            temp_path = default_storage.save(
-                f'temp/facial_recognition/{imagen.name}',
-                ContentFile(imagen.read())
-            )
-            full_temp_path = os.path.join(settings.MEDIA_ROOT, temp_path)
-
-            # Procesar imagen con reconocimiento facial usando AWS Rekognition
-            aws_service = AWSFacialRecognitionService()
-            recognition_result = aws_service.process_access_request(
-                full_temp_path, location
+            # Procesar imagen con reconocimiento facial usando AWS Rekognition;
+            # Rekognition recibe los bytes directamente, sin archivo temporal
+            aws_service = get_facial_recognition_service()
+            recognition_result = aws_service.process_access_request_bytes(
+                imagen.read(), location
             )
 
             if recognition_result['success']:
@@ -465,14 +698,6 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        finally:
-            # Limpiar archivo temporal
-            try:
-                if 'full_temp_path' in locals() and os.path.exists(full_temp_path):
-                    os.remove(full_temp_path)
-            except:
-                pass
-
     @action(detail=False, methods=['post'])
     def register_person(self, request):
         """
@@ -486,6 +711,8 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        cache_key = None
+        reclamado = False  # Si este envío es dueño de la clave de deduplicación
         try:
             # Obtener datos del request
             imagen = registration_serializer.validated_data['imagen']
@@ -506,17 +733,38 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
                         'error': 'Usuario no encontrado'
                     }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Guardar imagen temporalmente
-            temp_path = default_storage.save(
-                f'temp/facial_registration/{imagen.name}',
-                ContentFile(imagen.read())
-            )
-            full_temp_path = os.path.join(settings.MEDIA_ROOT, temp_path)
-
             # Registrar nueva persona usando AWS Rekognition
-            aws_service = AWSFacialRecognitionService()
-            registration_result = aws_service.register_new_person(
-                image_path=full_temp_path,
+            aws_service = get_facial_recognition_service()
+            image_bytes = imagen.read()
+
+            # Un reenvío del mismo formulario (doble clic) no indexa la cara otra vez: el primer
+            # envío reclama la clave con cache.add antes de llamar a Rekognition
+            huella = hashlib.sha256(image_bytes)
+            huella.update(f'|{name}|{person_type}|{is_authorized}|{user_id or ""}'.encode())
+            cache_key = f'ai_security:registro:{huella.hexdigest()}'
+            reclamado = cache.add(cache_key, REGISTRATION_IN_PROGRESS, REGISTRATION_DEDUPE_TIMEOUT)
+            if not reclamado:
+                profile_id = cache.get(cache_key)
+                if profile_id == REGISTRATION_IN_PROGRESS:
+                    return Response({
+                        'success': False,
+                        'error': 'Ya se está registrando una persona con estos datos'
+                    }, status=status.HTTP_409_CONFLICT)
+
+                person_profile = PersonProfile.objects.filter(pk=profile_id).first() if profile_id else None
+                if person_profile is not None:
+                    return Response({
+                        'success': True,
+                        'person_profile': PersonProfileSerializer(person_profile).data,
+                        'message': 'Persona ya registrada con esta imagen'
+                    }, status=status.HTTP_200_OK)
+
+                # El perfil recordado ya no existe (o la clave expiró entre add y get): reclamar de nuevo
+                cache.set(cache_key, REGISTRATION_IN_PROGRESS, REGISTRATION_DEDUPE_TIMEOUT)
+                reclamado = True
+
+            registration_result = aws_service.register_new_person_bytes(
+                image_bytes=image_bytes,
                 name=name,
                 person_type=person_type,
                 is_authorized=is_authorized,
@@ -525,6 +773,8 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
 
             if registration_result['success']:
                 person_profile = registration_result['person_profile']
+                cache.set(cache_key, person_profile.id, REGISTRATION_DEDUPE_TIMEOUT)
+                reclamado = False  # La clave ya apunta al perfil creado; no liberarla
                 person_info = PersonProfileSerializer(person_profile).data
 
                 response_data = {
@@ -533,6 +783,8 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
                     'message': registration_result.get('message', 'Persona registrada exitosamente')
                 }
             else:
+                # Liberar la clave para que se pueda reintentar de inmediato
+                cache.delete(cache_key)
                 response_data = {
                     'success': False,
                     'error': registration_result.get('error', 'Error registrando persona')
@@ -541,6 +793,8 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
             return Response(response_data, status=status.HTTP_201_CREATED if registration_result['success'] else status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
+            if reclamado:
+                cache.delete(cache_key)
             return Response(
                 {
                     'success': False,
@@ -549,13 +803,36 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        finally:
-            # Limpiar archivo temporal
-            try:
-                if 'full_temp_path' in locals() and os.path.exists(full_temp_path):
-                    os.remove(full_temp_path)
-            except:
-                pass
+    @staticmethod
+    def _calcular_stats():
+        """
+        Estadísticas de reconocimiento facial: una consulta por tabla.
+        """
+        now = timezone.now()
+        last_month = now - timedelta(days=30)
+
+        profiles = PersonProfile.objects.aggregate(
+            total=Count('id'),
+            authorized=Count('id', filter=Q(is_authorized=True))
+        )
+        logs = FacialAccessLog.objects.aggregate(
+            total=Count('id'),
+            recent=Count('id', filter=Q(timestamp_evento__gte=now - timedelta(hours=24))),
+            authorized=Count('id', filter=Q(timestamp_evento__gte=last_month, access_granted=True)),
+            denied=Count('id', filter=Q(timestamp_evento__gte=last_month, access_granted=False))
+        )
+
+        return {
+            'total_profiles': profiles['total'],
+            'authorized_profiles': profiles['authorized'],
+            'total_access_logs': logs['total'],
+            'recent_access_24h': logs['recent'],
+            'monthly_stats': {
+                'authorized_access': logs['authorized'],
+                'denied_access': logs['denied'],
+                'total_attempts': logs['authorized'] + logs['denied']
+            }
+        }
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -563,33 +840,8 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
         Obtener estadísticas de reconocimiento facial.
         """
         try:
-            # Estadísticas generales
-            total_profiles = PersonProfile.objects.count()
-            authorized_profiles = PersonProfile.objects.filter(is_authorized=True).count()
-            total_access_logs = FacialAccessLog.objects.count()
-
-            # Accesos recientes (últimas 24 horas)
-            recent_access = FacialAccessLog.objects.filter(
-                timestamp_evento__gte=timezone.now() - timedelta(hours=24)
-            ).count()
-
-            # Accesos autorizados vs denegados (último mes)
-            last_month = timezone.now() - timedelta(days=30)
-            monthly_logs = FacialAccessLog.objects.filter(timestamp_evento__gte=last_month)
-            authorized_access = monthly_logs.filter(access_granted=True).count()
-            denied_access = monthly_logs.filter(access_granted=False).count()
-
-            stats = {
-                'total_profiles': total_profiles,
-                'authorized_profiles': authorized_profiles,
-                'total_access_logs': total_access_logs,
-                'recent_access_24h': recent_access,
-                'monthly_stats': {
-                    'authorized_access': authorized_access,
-                    'denied_access': denied_access,
-                    'total_attempts': authorized_access + denied_access
-                }
-            }
+            # Se invalidan al cambiar perfiles o logs (ver signals.py)
+            stats = cache.get_or_set(FACIAL_STATS_CACHE_KEY, self._calcular_stats, FACIAL_STATS_CACHE_TIMEOUT)
 
             return Response({
                 'success': True,
@@ -610,18 +862,7 @@ class FacialRecognitionViewSet(viewsets.GenericViewSet):
         """
         Endpoint de prueba para verificar que el servicio de reconocimiento facial funciona.
         """
-        return Response({
-            'message': 'Servicio de reconocimiento facial funcionando',
-            'version': '1.0.0',
-            'supported_formats': ['JPEG', 'PNG', 'BMP'],
-            'max_file_size': '10MB',
-            'features': [
-                'Identificación de personas',
-                'Registro de nuevos perfiles',
-                'Control de acceso automatizado',
-                'Logs de acceso detallados'
-            ]
-        })
+        return Response(FACIAL_SERVICE_INFO)
 
 
 class CameraViewSet(viewsets.ViewSet):
@@ -632,14 +873,9 @@ class CameraViewSet(viewsets.ViewSet):
 
     def get_s3_client(self):
         """
-        Crear cliente S3 configurado.
+        Cliente S3 configurado, compartido por el proceso.
         """
-        return boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_DEFAULT_REGION
-        )
+        return _s3_client()
 
     @action(detail=False, methods=['get'])
     def list_cameras(self, request):
@@ -647,26 +883,7 @@ class CameraViewSet(viewsets.ViewSet):
         Listar las cámaras disponibles.
         """
         try:
-            cameras = [
-                {
-                    'id': 'camara1',
-                    'name': 'Cámara 1',
-                    'description': 'Cámara de entrada principal',
-                    'location': 'Entrada Principal'
-                },
-                {
-                    'id': 'camara2',
-                    'name': 'Cámara 2',
-                    'description': 'Cámara de garaje',
-                    'location': 'Garaje'
-                },
-                {
-                    'id': 'camara3',
-                    'name': 'Cámara 3',
-                    'description': 'Cámara de área común',
-                    'location': 'Área Común'
-                }
-            ]
+            cameras = CAMERAS
 
             return Response({
                 'success': True,
@@ -699,7 +916,7 @@ class CameraViewSet(viewsets.ViewSet):
                 )
 
             # Validar que la cámara existe
-            valid_cameras = ['camara1', 'camara2', 'camara3']
+            valid_cameras = [camera['id'] for camera in CAMERAS]
             if camera_id not in valid_cameras:
                 return Response(
                     {
@@ -709,41 +926,12 @@ class CameraViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            s3_client = self.get_s3_client()
-            bucket_name = settings.AWS_S3_BUCKET_NAME
-            prefix = f"{camera_id}/"
-
-            # Listar objetos en la carpeta de la cámara
-            response = s3_client.list_objects_v2(
-                Bucket=bucket_name,
-                Prefix=prefix
+            videos = cache.get_or_set(
+                f'ai_security:videos:{camera_id}',
+                lambda: self._listar_videos(camera_id),
+                VIDEO_LIST_CACHE_TIMEOUT
             )
 
-            videos = []
-            if 'Contents' in response:
-                for obj in response['Contents']:
-                    key = obj['Key']
-
-                    # Solo incluir archivos de video (no carpetas vacías)
-                    if key != prefix and (key.endswith('.mp4') or key.endswith('.avi') or key.endswith('.mov')):
-                        # Generar URL firmada válida por 1 hora
-                        try:
-                            presigned_url = s3_client.generate_presigned_url(
-                                'get_object',
-                                Params={'Bucket': bucket_name, 'Key': key},
-                                ExpiresIn=3600  # 1 hora
-                            )
-
-                            videos.append({
-                                'key': key,
-                                'name': key.split('/')[-1],  # Solo el nombre del archivo
-                                'size': obj['Size'],
-                                'last_modified': obj['LastModified'].isoformat(),
-                                'url': presigned_url
-                            })
-                        except ClientError as e:
-                            print(f"Error generando URL para {key}: {e}")
-
             return Response({
                 'success': True,
                 'camera_id': camera_id,
@@ -768,6 +956,41 @@ class CameraViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def _listar_videos(self, camera_id):
+        """
+        Listar los videos de la carpeta de la cámara en S3 con sus URLs firmadas.
+        """
+        s3_client = self.get_s3_client()
+        bucket_name = settings.AWS_S3_BUCKET_NAME
+        prefix = f"{camera_id}/"
+
+        # El paginador recorre todas las páginas de 1000 objetos de la carpeta
+        paginator = s3_client.get_paginator('list_objects_v2')
+        objects = (
+            obj
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+            for obj in page.get('Contents', [])
+        )
+
+        # Solo archivos de video (no carpetas vacías); la firma es local y no llama a S3
+        videos = [
+            {
+                'key': obj['Key'],
+                'name': obj['Key'].split('/')[-1],  # Solo el nombre del archivo
+                'size': obj['Size'],
+                'last_modified': obj['LastModified'],  # El renderer serializa datetime en ISO 8601
+                'url': s3_client.generate_presigned_url(
+                    'get_object',
+                    Params={'Bucket': bucket_name, 'Key': obj['Key']},
+                    ExpiresIn=3600  # 1 hora
+                )
+            }
+            for obj in objects
+            if obj['Key'] != prefix and obj['Key'].endswith(VIDEO_EXTENSIONS)
+        ]
+
+        return videos
+
     @action(detail=False, methods=['get'])
     def get_video_url(self, request):
         """
@@ -786,37 +1009,46 @@ class CameraViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            s3_client = self.get_s3_client()
             bucket_name = settings.AWS_S3_BUCKET_NAME
             key = f"{camera_id}/{video_name}"
 
-            # Verificar que el archivo existe
-            try:
-                s3_client.head_object(Bucket=bucket_name, Key=key)
-            except ClientError as e:
-                if e.response['Error']['Code'] == '404':
-                    return Response(
-                        {
-                            'success': False,
-                            'error': 'Video no encontrado'
-                        },
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-                raise
-
-            # Generar URL firmada válida por 1 hora
-            presigned_url = s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': bucket_name, 'Key': key},
-                ExpiresIn=3600
-            )
+            # Una URL firmada sirve 1 hora: se reutiliza sin volver a consultar S3
+            cache_key = f'ai_security:presign:{bucket_name}:{key}'
+            signed = cache.get(cache_key)
+            if signed is None:
+                s3_client = self.get_s3_client()
+
+                # Verificar que el archivo existe
+                try:
+                    s3_client.head_object(Bucket=bucket_name, Key=key)
+                except ClientError as e:
+                    if e.response['Error']['Code'] == '404':
+                        return Response(
+                            {
+                                'success': False,
+                                'error': 'Video no encontrado'
+                            },
+                            status=status.HTTP_404_NOT_FOUND
+                        )
+                    raise
+
+                # Generar URL firmada válida por 1 hora
+                signed = {
+                    'url': s3_client.generate_presigned_url(
+                        'get_object',
+                        Params={'Bucket': bucket_name, 'Key': key},
+                        ExpiresIn=PRESIGNED_URL_EXPIRES_IN
+                    ),
+                    'expires_at': time.time() + PRESIGNED_URL_EXPIRES_IN
+                }
+                cache.set(cache_key, signed, PRESIGNED_URL_CACHE_TIMEOUT)
 
             return Response({
                 'success': True,
                 'camera_id': camera_id,
                 'video_name': video_name,
-                'url': presigned_url,
-                'expires_in': 3600
+                'url': signed['url'],
+                'expires_in': int(signed['expires_at'] - time.time())
             })
 
         except ClientError as e:
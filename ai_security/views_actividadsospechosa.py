@@ -1,30 +1,98 @@
-from django.db import models
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connections, models
+from django.db.models import Prefetch
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.conf import settings
+from django.utils import timezone
 
 from .models import TipoActividad, AnalisisVideo, DeteccionActividad
 from .serializers import (
     TipoActividadSerializer,
     AnalisisVideoSerializer,
     DeteccionActividadSerializer,
-    IniciarAnalisisSerializer,
-    EstadisticasAnalisisSerializer
+    IniciarAnalisisSerializer
+)
+from .services.video_analysis import get_video_analysis_service
+from .signals import TIPOS_ACTIVIDAD_CACHE_KEY
+from .tasks import encolar, iniciar_analisis_task
+
+TIPOS_ACTIVIDAD_CACHE_TIMEOUT = 3600  # segundos
+
+# Consultas simultáneas a Rekognition en verificar_pendientes
+VERIFICACION_WORKERS = 8
+
+# Columnas del listado de análisis (usuario_nombre se arma con nombre y apellido del usuario)
+ANALISIS_LIST_FIELDS = (
+    'id', 'camera_id', 'video_name', 'video_url', 'estado', 'job_id', 'iniciado_at',
+    'completado_at', 'usuario', 'actividades_detectadas', 'confianza_promedio', 'error_mensaje',
+    'usuario__first_name', 'usuario__last_name',
 )
-from .services.video_analysis import VideoAnalysisService
+
+ESTADO_DISPLAY = dict(AnalisisVideo.ESTADO_CHOICES)
+
+
+def _fecha_local(value):
+    """
+    Fecha en ISO 8601 en la zona horaria local, igual que DateTimeField de DRF.
+    """
+    return timezone.localtime(value).isoformat() if value else None
 
 
-class ActividadSospechosaViewSet(viewsets.ViewSet):
+def _analisis_row_to_dict(row):
+    """
+    Fila de .values(ANALISIS_LIST_FIELDS) con la forma de AnalisisVideoSerializer, sin detecciones.
+    """
+    return {
+        'id': row['id'],
+        'camera_id': row['camera_id'],
+        'video_name': row['video_name'],
+        'video_url': row['video_url'],
+        'estado': row['estado'],
+        'estado_display': ESTADO_DISPLAY.get(row['estado'], row['estado']),
+        'job_id': row['job_id'],
+        'iniciado_at': _fecha_local(row['iniciado_at']),
+        'completado_at': _fecha_local(row['completado_at']),
+        'usuario': row['usuario'],
+        'usuario_nombre': f"{row['usuario__first_name']} {row['usuario__last_name']}".strip(),
+        'actividades_detectadas': row['actividades_detectadas'],
+        'confianza_promedio': row['confianza_promedio'],
+        'error_mensaje': row['error_mensaje'],
+    }
+
+
+class ActividadSospechosaViewSet(viewsets.GenericViewSet):
     """
     ViewSet para análisis de actividades sospechosas en videos.
     """
     permission_classes = [IsAuthenticated]
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.video_service = VideoAnalysisService()
+    @property
+    def video_service(self):
+        return get_video_analysis_service()
+
+    def get_queryset(self):
+        """
+        Análisis visibles para el usuario: todos si es superuser, si no solo los suyos.
+        """
+        analisis = AnalisisVideo.objects.all()
+        if not self.request.user.is_superuser:
+            analisis = analisis.filter(usuario=self.request.user)
+        return analisis
+
+    def _get_analisis_qs(self):
+        """
+        get_queryset() con el usuario y las detecciones (con su tipo) ya cargados
+        para AnalisisVideoSerializer.
+        """
+        return self.get_queryset().select_related('usuario').prefetch_related(
+            Prefetch('detecciones', queryset=DeteccionActividad.objects.select_related('tipo_actividad'))
+        )
 
     @action(detail=False, methods=['post'])
     def iniciar_analisis(self, request):
@@ -46,21 +114,23 @@ class ActividadSospechosaViewSet(viewsets.ViewSet):
             # Construir URL del video en S3
             video_url = f"s3://{settings.AWS_S3_BUCKET_NAME}/{camera_id}/{video_name}"
 
-            # Iniciar análisis
-            analisis = self.video_service.iniciar_analisis(
+            # Registrar el análisis y arrancar el job de Rekognition en segundo plano;
+            # el cliente sigue el avance con verificar_estado / detalle_analisis
+            analisis = self.video_service.crear_analisis(
                 camera_id=camera_id,
                 video_name=video_name,
                 video_url=video_url,
                 usuario=request.user
             )
+            encolar(iniciar_analisis_task, analisis.id)
 
             serializer_response = AnalisisVideoSerializer(analisis)
 
             return Response({
                 'success': True,
-                'message': 'Análisis iniciado exitosamente',
+                'message': 'Análisis registrado, iniciando en Rekognition',
                 'analisis': serializer_response.data
-            }, status=status.HTTP_201_CREATED)
+            }, status=status.HTTP_202_ACCEPTED)
 
         except Exception as e:
             return Response({
@@ -74,18 +144,13 @@ class ActividadSospechosaViewSet(viewsets.ViewSet):
         Obtener análisis del usuario actual.
         """
         try:
-            # Si es superuser, mostrar todos; si no, solo los suyos
-            if request.user.is_superuser:
-                analisis = AnalisisVideo.objects.all()
-            else:
-                analisis = AnalisisVideo.objects.filter(usuario=request.user)
-
-            analisis = analisis.order_by('-iniciado_at')
-            serializer = AnalisisVideoSerializer(analisis, many=True)
+            # El listado no incluye detecciones y se arma con diccionarios de .values(),
+            # sin instanciar modelos ni serializers por fila
+            filas = self.get_queryset().order_by('-iniciado_at').values(*ANALISIS_LIST_FIELDS)
 
             return Response({
                 'success': True,
-                'analisis': serializer.data
+                'analisis': [_analisis_row_to_dict(fila) for fila in filas]
             })
 
         except Exception as e:
@@ -101,10 +166,7 @@ class ActividadSospechosaViewSet(viewsets.ViewSet):
         """
         try:
             # Verificar que el análisis existe y el usuario tiene permisos
-            if request.user.is_superuser:
-                analisis = AnalisisVideo.objects.get(pk=pk)
-            else:
-                analisis = AnalisisVideo.objects.get(pk=pk, usuario=request.user)
+            analisis = self._get_analisis_qs().get(pk=pk)
 
             serializer = AnalisisVideoSerializer(analisis)
 
@@ -131,16 +193,13 @@ class ActividadSospechosaViewSet(viewsets.ViewSet):
         """
         try:
             # Verificar que el análisis existe y el usuario tiene permisos
-            if request.user.is_superuser:
-                analisis = AnalisisVideo.objects.get(pk=pk)
-            else:
-                analisis = AnalisisVideo.objects.get(pk=pk, usuario=request.user)
+            analisis = self.get_queryset().get(pk=pk)
 
             # Verificar estado con el servicio
             completado = self.video_service.verificar_estado_analisis(analisis)
 
-            # Recargar el análisis para obtener datos actualizados
-            analisis.refresh_from_db()
+            # Recargar el análisis con sus detecciones ya procesadas en las mismas consultas
+            analisis = self._get_analisis_qs().get(pk=analisis.pk)
             serializer = AnalisisVideoSerializer(analisis)
 
             return Response({
@@ -160,18 +219,35 @@ class ActividadSospechosaViewSet(viewsets.ViewSet):
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _verificar_estado(self, analisis):
+        """
+        Verificar un análisis desde un hilo del pool, cerrando al final la conexión que abrió.
+        """
+        try:
+            return self.video_service.verificar_estado_analisis(analisis)
+        finally:
+            connections.close_all()
+
     @action(detail=False, methods=['post'])
     def verificar_pendientes(self, request):
         """
         Verificar todos los análisis pendientes y actualizar su estado.
         """
         try:
-            analisis_pendientes = self.video_service.obtener_analisis_pendientes()
+            analisis_pendientes = list(self.video_service.obtener_analisis_pendientes())
             resultados = []
 
-            for analisis in analisis_pendientes:
+            # Cada verificación espera a Rekognition: se consultan en paralelo y se
+            # recogen en el orden original
+            with ThreadPoolExecutor(max_workers=VERIFICACION_WORKERS) as executor:
+                futuros = [
+                    (analisis, executor.submit(self._verificar_estado, analisis))
+                    for analisis in analisis_pendientes
+                ]
+
+            for analisis, futuro in futuros:
                 try:
-                    completado = self.video_service.verificar_estado_analisis(analisis)
+                    completado = futuro.result()
                     resultados.append({
                         'analisis_id': analisis.id,
                         'video_name': analisis.video_name,
@@ -197,6 +273,55 @@ class ActividadSospechosaViewSet(viewsets.ViewSet):
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny], authentication_classes=[])
+    def notificacion_sns(self, request):
+        """
+        Recibir la notificación SNS de Rekognition cuando termina un análisis.
+        """
+        topic_arn = getattr(settings, 'REKOGNITION_SNS_TOPIC_ARN', None)
+
+        try:
+            # SNS envía el cuerpo como text/plain, por eso se decodifica manualmente
+            mensaje_sns = json.loads(request.body)
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'Cuerpo de notificación inválido'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not topic_arn or mensaje_sns.get('TopicArn') != topic_arn:
+            return Response({
+                'success': False,
+                'error': 'Tópico SNS no autorizado'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            tipo_mensaje = mensaje_sns.get('Type')
+
+            if tipo_mensaje == 'SubscriptionConfirmation':
+                self.video_service.confirmar_suscripcion_sns(topic_arn, mensaje_sns['Token'])
+                return Response({'success': True})
+
+            if tipo_mensaje != 'Notification':
+                return Response({'success': True})
+
+            # Mensaje de Rekognition: {"JobId": "...", "Status": "SUCCEEDED", ...}
+            # Del mensaje solo se toma el JobId: el estado real se vuelve a consultar en
+            # Rekognition (get_label_detection), así que un aviso falsificado no completa nada
+            job_id = json.loads(mensaje_sns['Message'])['JobId']
+            completado = self.video_service.procesar_notificacion(job_id)
+
+            return Response({
+                'success': True,
+                'completado': completado
+            })
+
+        except Exception as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """
@@ -204,55 +329,54 @@ class ActividadSospechosaViewSet(viewsets.ViewSet):
         """
         try:
             # Estadísticas generales
-            if request.user.is_superuser:
-                analisis_qs = AnalisisVideo.objects.all()
-                detecciones_qs = DeteccionActividad.objects.all()
-            else:
-                analisis_qs = AnalisisVideo.objects.filter(usuario=request.user)
-                detecciones_qs = DeteccionActividad.objects.filter(analisis__usuario=request.user)
-
-            total_analisis = analisis_qs.count()
-            analisis_completados = analisis_qs.filter(estado='COMPLETADO').count()
-            analisis_procesando = analisis_qs.filter(estado='PROCESANDO').count()
-
-            total_detecciones = detecciones_qs.count()
-            avisos_generados = detecciones_qs.filter(aviso_generado=True).count()
-
-            # Detecciones por categoría
-            detecciones_por_categoria = {}
-            categorias = TipoActividad.objects.values_list('categoria', flat=True).distinct()
-
-            for categoria in categorias:
-                count = detecciones_qs.filter(tipo_actividad__categoria=categoria).count()
-                detecciones_por_categoria[categoria] = count
-
-            # Confianza promedio
-            confianza_promedio = 0.0
-            if analisis_completados > 0:
-                analisis_con_confianza = analisis_qs.filter(
-                    estado='COMPLETADO',
-                    confianza_promedio__isnull=False
-                )
-                if analisis_con_confianza.exists():
-                    confianza_promedio = analisis_con_confianza.aggregate(
-                        promedio=models.Avg('confianza_promedio')
-                    )['promedio'] or 0.0
+            analisis_qs = self.get_queryset()
+            detecciones_qs = DeteccionActividad.objects.all()
+            if not request.user.is_superuser:
+                detecciones_qs = detecciones_qs.filter(analisis__usuario=request.user)
+
+            # Conteos y confianza promedio: una consulta por tabla
+            completados = models.Q(estado='COMPLETADO')
+            totales_analisis = analisis_qs.aggregate(
+                total=models.Count('id'),
+                completados=models.Count('id', filter=completados),
+                procesando=models.Count('id', filter=models.Q(estado='PROCESANDO')),
+                confianza=models.Avg('confianza_promedio', filter=completados)
+            )
+            totales_detecciones = detecciones_qs.aggregate(
+                total=models.Count('id'),
+                avisos=models.Count('id', filter=models.Q(aviso_generado=True))
+            )
+
+            # Detecciones por categoría en un solo GROUP BY; el LEFT JOIN desde los tipos
+            # mantiene en cero las categorías sin detecciones
+            filtro_detecciones = None
+            if not request.user.is_superuser:
+                filtro_detecciones = models.Q(deteccionactividad__analisis__usuario=request.user)
+
+            categorias = (
+                TipoActividad.objects.order_by()
+                .values('categoria')
+                .annotate(total=models.Count('deteccionactividad', filter=filtro_detecciones))
+            )
+            detecciones_por_categoria = {fila['categoria']: fila['total'] for fila in categorias}
 
+            # AVG ignora los NULL y devuelve None si no hay análisis completados
+            confianza_promedio = float(totales_analisis['confianza'] or 0.0)
+
+            # El dict ya tiene la forma de EstadisticasAnalisisSerializer; se devuelve sin pasar por él
             estadisticas = {
-                'total_analisis': total_analisis,
-                'analisis_completados': analisis_completados,
-                'analisis_procesando': analisis_procesando,
-                'total_detecciones': total_detecciones,
+                'total_analisis': totales_analisis['total'],
+                'analisis_completados': totales_analisis['completados'],
+                'analisis_procesando': totales_analisis['procesando'],
+                'total_detecciones': totales_detecciones['total'],
                 'detecciones_por_categoria': detecciones_por_categoria,
                 'confianza_promedio': round(confianza_promedio, 2),
-                'avisos_generados': avisos_generados
+                'avisos_generados': totales_detecciones['avisos']
             }
 
-            serializer = EstadisticasAnalisisSerializer(estadisticas)
-
             return Response({
                 'success': True,
-                'estadisticas': serializer.data
+                'estadisticas': estadisticas
             })
 
         except Exception as e:
@@ -267,12 +391,16 @@ class ActividadSospechosaViewSet(viewsets.ViewSet):
         Obtener tipos de actividades disponibles para detección.
         """
         try:
-            tipos = TipoActividad.objects.filter(activo=True)
-            serializer = TipoActividadSerializer(tipos, many=True)
+            # Configuración casi estática: se invalida al guardar o eliminar un tipo (ver signals.py)
+            tipos_actividad = cache.get_or_set(
+                TIPOS_ACTIVIDAD_CACHE_KEY,
+                lambda: TipoActividadSerializer(TipoActividad.objects.filter(activo=True), many=True).data,
+                TIPOS_ACTIVIDAD_CACHE_TIMEOUT
+            )
 
             return Response({
                 'success': True,
-                'tipos_actividad': serializer.data
+                'tipos_actividad': tipos_actividad
             })
 
         except Exception as e:
@@ -288,10 +416,10 @@ class ActividadSospechosaViewSet(viewsets.ViewSet):
         """
         try:
             # Buscar la detección
-            deteccion = DeteccionActividad.objects.get(pk=pk)
+            deteccion = DeteccionActividad.objects.select_related('analisis', 'tipo_actividad').get(pk=pk)
 
-            # Verificar permisos
-            if not request.user.is_superuser and deteccion.analisis.usuario != request.user:
+            # Verificar permisos comparando la FK, sin cargar el usuario del análisis
+            if not request.user.is_superuser and deteccion.analisis.usuario_id != request.user.id:
                 return Response({
                     'success': False,
                     'error': 'No tienes permisos para esta detección'
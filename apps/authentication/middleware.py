@@ -0,0 +1,29 @@
+import ipaddress
+
+
+def _ip_valida(valor):
+    """
+    Devuelve la IP normalizada o None si el valor no es una dirección válida.
+    """
+    if not valor:
+        return None
+    try:
+        return str(ipaddress.ip_address(valor.strip()))
+    except ValueError:
+        return None
+
+
+class ClientIPMiddleware:
+    """
+    Calcula una sola vez por request la IP del cliente y la deja en request.client_ip.
+    Usa el primer valor de X-Forwarded-For (el proxy de despliegue) y si no es válido REMOTE_ADDR.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        ip = _ip_valida(x_forwarded_for.split(',')[0]) if x_forwarded_for else None
+        request.client_ip = ip or _ip_valida(request.META.get('REMOTE_ADDR'))
+        return self.get_response(request)
@@ -1,13 +1,61 @@
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.password_validation import validate_password
+from django.db.models import Q
 from apps.users.models import User, Role
 from apps.core.models import Condominio
 
 
+def _validar_email_cedula_unicos(attrs, instance=None):
+    """
+    Comprueba en una sola consulta que el email y la cédula no pertenezcan a otro usuario.
+    """
+    email = attrs.get('email')
+    cedula = attrs.get('cedula')
+
+    condicion = Q()
+    if email:
+        condicion |= Q(email=email)
+    if cedula:
+        condicion |= Q(cedula=cedula)
+    if not condicion:
+        return
+
+    qs = User.objects.filter(condicion)
+    if instance is not None:
+        qs = qs.exclude(pk=instance.pk)
+
+    errores = {}
+    for email_existente, cedula_existente in qs.values_list('email', 'cedula'):
+        if email and email_existente == email:
+            errores['email'] = ["Ya existe un usuario con este email."]
+        if cedula and cedula_existente == cedula:
+            errores['cedula'] = ["Ya existe un usuario con esta cédula."]
+    if errores:
+        raise serializers.ValidationError(errores)
+
+
+def _user_claims(user):
+    """
+    Datos del usuario compartidos por los claims del token y la respuesta del login.
+    Se calculan una vez por instancia.
+    """
+    claims = getattr(user, '_claims', None)
+    if claims is None:
+        claims = user._claims = {
+            'username': user.username,
+            'email': user.email,
+            'full_name': user.get_full_name(),
+            'role': user.role.nombre if user.role else None,
+            'condominio': user.condominio.nombre if user.condominio else None,
+        }
+    return claims
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Serializer personalizado para JWT que incluye información adicional del usuario.
+    El rol y el condominio llegan precargados desde SelectRelatedModelBackend.
     """
     
     @classmethod
@@ -15,11 +63,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         
         # Agregar información personalizada al token
-        token['username'] = user.username
-        token['email'] = user.email
-        token['full_name'] = user.get_full_name()
-        token['role'] = user.role.nombre if user.role else None
-        token['condominio'] = user.condominio.nombre if user.condominio else None
+        claims = _user_claims(user)
+        token['username'] = claims['username']
+        token['email'] = claims['email']
+        token['full_name'] = claims['full_name']
+        token['role'] = claims['role']
+        token['condominio'] = claims['condominio']
         
         return token
 
@@ -35,14 +84,15 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             propietario_id = None
 
         # Agregar información del usuario a la respuesta
+        claims = _user_claims(self.user)
         data['user'] = {
             'id': self.user.id,
-            'username': self.user.username,
-            'email': self.user.email,
+            'username': claims['username'],
+            'email': claims['email'],
             'first_name': self.user.first_name,
             'last_name': self.user.last_name,
-            'role': self.user.role.nombre if self.user.role else None,
-            'condominio': self.user.condominio.nombre if self.user.condominio else None,
+            'role': claims['role'],
+            'condominio': claims['condominio'],
             'is_verified': self.user.is_verified,
             'propietario_id': propietario_id,
         }
@@ -76,24 +126,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         """
         if attrs['password'] != attrs['password_confirm']:
             raise serializers.ValidationError("Las contraseñas no coinciden.")
+        _validar_email_cedula_unicos(attrs)
         return attrs
 
-    def validate_email(self, value):
-        """
-        Validar que el email sea único.
-        """
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Ya existe un usuario con este email.")
-        return value
-
-    def validate_cedula(self, value):
-        """
-        Validar que la cédula sea única si se proporciona.
-        """
-        if value and User.objects.filter(cedula=value).exists():
-            raise serializers.ValidationError("Ya existe un usuario con esta cédula.")
-        return value
-
     def create(self, validated_data):
         """
         Crear un nuevo usuario.
@@ -149,21 +184,20 @@ class UserProfileSerializer(serializers.ModelSerializer):
             print(f"Debug: Error getting propietario_id: {e}")
             return None
 
-    def validate_email(self, value):
+    def validate(self, attrs):
         """
-        Validar que el email sea único (excluyendo el usuario actual).
+        Validar que el email y la cédula sean únicos (excluyendo el usuario actual).
         """
-        if User.objects.filter(email=value).exclude(id=self.instance.id if self.instance else None).exists():
-            raise serializers.ValidationError("Ya existe un usuario con este email.")
-        return value
+        _validar_email_cedula_unicos(attrs, self.instance)
+        return attrs
 
-    def validate_cedula(self, value):
-        """
-        Validar que la cédula sea única (excluyendo el usuario actual).
-        """
-        if value and User.objects.filter(cedula=value).exclude(id=self.instance.id if self.instance else None).exists():
-            raise serializers.ValidationError("Ya existe un usuario con esta cédula.")
-        return value
+
+class UserProfileReadSerializer(UserProfileSerializer):
+    """
+    Variante de solo lectura del perfil para las respuestas GET y de registro.
+    """
+    class Meta(UserProfileSerializer.Meta):
+        read_only_fields = UserProfileSerializer.Meta.fields
 
 
 class RoleSerializer(serializers.ModelSerializer):
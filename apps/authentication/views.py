@@ -10,7 +10,8 @@ from apps.users.models import User, UserSession
 from apps.authentication.serializers import (
     CustomTokenObtainPairSerializer,
     UserRegistrationSerializer,
-    UserProfileSerializer
+    UserProfileSerializer,
+    UserProfileReadSerializer
 )
 
 
@@ -38,14 +39,14 @@ def register(request):
         UserSession.objects.create(
             user=user,
             session_key=str(refresh),
-            ip_address=get_client_ip(request),
+            ip_address=request.client_ip,
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             login_time=timezone.now()
         )
         
         return Response({
             'message': 'Usuario registrado exitosamente',
-            'user': UserProfileSerializer(user).data,
+            'user': UserProfileReadSerializer(user).data,
             'tokens': {
                 'access': str(refresh.access_token),
                 'refresh': str(refresh),
@@ -74,18 +75,12 @@ def logout(request):
                 # Si hay error con blacklist, continuar con el logout normal
                 pass
         
-        # Actualizar sesión
-        try:
-            session = UserSession.objects.filter(
-                user=request.user,
-                is_active=True
-            ).first()
-            if session:
-                session.logout_time = timezone.now()
-                session.is_active = False
-                session.save()
-        except UserSession.DoesNotExist:
-            pass
+        # Cerrar las sesiones activas en un solo UPDATE
+        ahora = timezone.now()
+        UserSession.objects.filter(
+            user=request.user,
+            is_active=True
+        ).update(logout_time=ahora, is_active=False, updated_at=ahora)
         
         return Response({
             'message': 'Sesión cerrada exitosamente'
@@ -103,7 +98,7 @@ def profile(request):
     """
     Obtener perfil del usuario autenticado.
     """
-    serializer = UserProfileSerializer(request.user)
+    serializer = UserProfileReadSerializer(request.user)
     return Response(serializer.data)
 
 
@@ -147,20 +142,8 @@ def change_password(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     user.set_password(new_password)
-    user.save()
+    user.save(update_fields=['password', 'updated_at'])
     
     return Response({
         'message': 'Contraseña actualizada exitosamente'
     }, status=status.HTTP_200_OK)
-
-
-def get_client_ip(request):
-    """
-    Obtener la IP del cliente.
-    """
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CommunicationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.communications'
+
+    def ready(self):
+        import apps.communications.signals  # noqa: F401
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.24 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='avisocomunicado',
+            index=models.Index(fields=['condominio', 'is_published', '-fecha_publicacion'], name='aviso_cond_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='avisocomunicado',
+            index=models.Index(fields=['fecha_expiracion'], name='aviso_expiracion_idx'),
+        ),
+    ]
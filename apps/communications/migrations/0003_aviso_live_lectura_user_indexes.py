@@ -0,0 +1,21 @@
+# Generated by Django 4.2.24 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0002_aviso_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='avisocomunicado',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_published', True)), fields=['condominio', '-fecha_publicacion'], name='aviso_live_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lecturaaviso',
+            index=models.Index(fields=['user', 'aviso'], name='lectura_user_aviso_idx'),
+        ),
+    ]
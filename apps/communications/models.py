@@ -1,8 +1,24 @@
 from django.db import models
+from django.db.models import BooleanField, Case, Q, Value, When
+from django.db.models.functions import Now
 from apps.core.models import TimeStampedModel, Condominio
 from apps.users.models import User
 
 
+class AvisoComunicadoQuerySet(models.QuerySet):
+    def with_expiration(self):
+        """
+        Anota is_expired calculado por la base de datos con una sola lectura del reloj por consulta.
+        """
+        return self.annotate(is_expired=Case(
+            When(fecha_expiracion__isnull=True, then=Value(False)),
+            # Mismo límite que el filtro vigentes=true (fecha_expiracion > ahora)
+            When(fecha_expiracion__lte=Now(), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ))
+
+
 class AvisoComunicado(TimeStampedModel):
     """
     Modelo para avisos y comunicados del condominio.
@@ -31,25 +47,29 @@ class AvisoComunicado(TimeStampedModel):
     archivo_adjunto = models.FileField(upload_to='avisos/adjuntos/', blank=True, null=True)
     imagen = models.ImageField(upload_to='avisos/imagenes/', blank=True, null=True)
 
+    objects = AvisoComunicadoQuerySet.as_manager()
+
     class Meta:
         db_table = 'avisos_comunicados'
         verbose_name = 'Aviso/Comunicado'
         verbose_name_plural = 'Avisos/Comunicados'
         ordering = ['-fecha_publicacion']
+        indexes = [
+            # Listado por condominio de avisos publicados, del más reciente al más antiguo
+            models.Index(fields=['condominio', 'is_published', '-fecha_publicacion'], name='aviso_cond_pub_idx'),
+            # Filtro de vigentes (fecha_expiracion nula o futura)
+            models.Index(fields=['fecha_expiracion'], name='aviso_expiracion_idx'),
+            # Avisos visibles para usuarios no administradores (activos y publicados)
+            models.Index(
+                fields=['condominio', '-fecha_publicacion'],
+                condition=Q(is_active=True, is_published=True),
+                name='aviso_live_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.titulo} - {self.condominio.nombre}"
 
-    @property
-    def is_expired(self):
-        """
-        Verifica si el aviso ha expirado.
-        """
-        if not self.fecha_expiracion:
-            return False
-        from django.utils import timezone
-        return timezone.now() > self.fecha_expiracion
-
 
 class LecturaAviso(TimeStampedModel):
     """
@@ -63,6 +83,10 @@ class LecturaAviso(TimeStampedModel):
     class Meta:
         db_table = 'lectura_avisos'
         unique_together = ['aviso', 'user']
+        indexes = [
+            # Lecturas de un usuario (no_leidos, listado de lecturas propias)
+            models.Index(fields=['user', 'aviso'], name='lectura_user_aviso_idx'),
+        ]
         verbose_name = 'Lectura de Aviso'
         verbose_name_plural = 'Lecturas de Avisos'
 
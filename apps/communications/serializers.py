@@ -1,16 +1,22 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from apps.communications.models import AvisoComunicado, LecturaAviso
 from apps.core.models import Condominio
 from apps.users.models import User
 
+# Caracteres de contenido que muestra el listado de avisos
+PREVIEW_CONTENIDO_LENGTH = 150
+
 
 class AvisoComunicadoSerializer(serializers.ModelSerializer):
     autor_name = serializers.CharField(source='autor.get_full_name', read_only=True)
     condominio_nombre = serializers.CharField(source='condominio.nombre', read_only=True)
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
     prioridad_display = serializers.CharField(source='get_prioridad_display', read_only=True)
-    is_expired = serializers.CharField(read_only=True)
-    lecturas_count = serializers.SerializerMethodField()
+    # Anotado con AvisoComunicado.objects.with_expiration()
+    is_expired = serializers.BooleanField(read_only=True)
+    # Anotado con Count('lecturas') en AvisoComunicadoViewSet.get_queryset
+    lecturas_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = AvisoComunicado
@@ -22,12 +28,6 @@ class AvisoComunicadoSerializer(serializers.ModelSerializer):
             'is_expired', 'lecturas_count', 'created_at', 'updated_at'
         ]
 
-    def get_lecturas_count(self, obj):
-        """
-        Obtener el número de lecturas del aviso
-        """
-        return obj.lecturas.count()
-
 
 class AvisoComunicadoCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -80,27 +80,30 @@ class LecturaAvisoCreateSerializer(serializers.ModelSerializer):
         if not value.is_active or not value.is_published:
             raise serializers.ValidationError("El aviso no está disponible para lectura")
         
-        # Validar que el usuario no haya leído ya este aviso
-        user = self.context['request'].user
-        if LecturaAviso.objects.filter(aviso=value, user=user).exists():
-            raise serializers.ValidationError("Ya has leído este aviso")
-        
         return value
 
     def create(self, validated_data):
-        # Asignar automáticamente el usuario actual
-        validated_data['user'] = self.context['request'].user
-        
-        # Obtener la IP del request
         request = self.context['request']
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        validated_data['ip_address'] = ip
         
-        return super().create(validated_data)
+        # Asignar automáticamente el usuario actual y la IP (ClientIPMiddleware)
+        validated_data['user'] = request.user
+        validated_data['ip_address'] = request.client_ip
+        
+        # unique_together (aviso, user) detecta la lectura repetida en el mismo INSERT
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({'aviso': ["Ya has leído este aviso"]})
+
+
+class LecturaAvisoBulkCreateSerializer(serializers.Serializer):
+    """
+    Serializer para marcar varios avisos como leídos en un solo request
+    """
+    avisos = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1, max_length=100
+    )
 
 
 class AvisoComunicadoListSerializer(serializers.ModelSerializer):
@@ -111,8 +114,10 @@ class AvisoComunicadoListSerializer(serializers.ModelSerializer):
     condominio_nombre = serializers.CharField(source='condominio.nombre', read_only=True)
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
     prioridad_display = serializers.CharField(source='get_prioridad_display', read_only=True)
-    is_expired = serializers.CharField(read_only=True)
-    lecturas_count = serializers.SerializerMethodField()
+    # Anotado con AvisoComunicado.objects.with_expiration()
+    is_expired = serializers.BooleanField(read_only=True)
+    # Anotado con Count('lecturas') en AvisoComunicadoViewSet.get_queryset
+    lecturas_count = serializers.IntegerField(read_only=True)
     preview_contenido = serializers.SerializerMethodField()
     
     class Meta:
@@ -125,16 +130,12 @@ class AvisoComunicadoListSerializer(serializers.ModelSerializer):
             'created_at'
         ]
 
-    def get_lecturas_count(self, obj):
-        """
-        Obtener el número de lecturas del aviso
-        """
-        return obj.lecturas.count()
-
     def get_preview_contenido(self, obj):
         """
-        Obtener un preview del contenido (primeros 150 caracteres)
+        Obtener un preview del contenido (primeros 150 caracteres).
+        contenido_inicio viene anotado con un carácter de más para saber si hay que cortar.
         """
-        if len(obj.contenido) > 150:
-            return obj.contenido[:150] + "..."
-        return obj.contenido
\ No newline at end of file
+        contenido = obj.contenido_inicio
+        if len(contenido) > PREVIEW_CONTENIDO_LENGTH:
+            return contenido[:PREVIEW_CONTENIDO_LENGTH] + "..."
+        return contenido
\ No newline at end of file
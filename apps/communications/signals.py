@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import AvisoComunicado, LecturaAviso
+
+# Versión de los conteos de paginación cacheados (CachedCountPageNumberPagination).
+# LocMemCache no permite borrar por patrón, así que se invalida cambiando de versión.
+CONTEOS_VERSION_CACHE_KEY = 'communications:conteos_version'
+
+
+@receiver(post_save, sender=AvisoComunicado)
+@receiver(post_delete, sender=AvisoComunicado)
+@receiver(post_save, sender=LecturaAviso)
+@receiver(post_delete, sender=LecturaAviso)
+def conteos_changed(sender, instance, **kwargs):
+    """
+    Invalidar los conteos cacheados de avisos y lecturas
+    """
+    invalidar_conteos()
+
+
+def invalidar_conteos():
+    """
+    Cambia la versión de los conteos; también se llama tras bulk_create, que no emite señales.
+    """
+    try:
+        cache.incr(CONTEOS_VERSION_CACHE_KEY)
+    except ValueError:
+        # La clave no existe todavía (o expiró): cualquier valor nuevo deja obsoletos los conteos previos
+        cache.set(CONTEOS_VERSION_CACHE_KEY, 2, None)
@@ -1,23 +1,150 @@
-from rest_framework import viewsets, status
+import hashlib
+
+from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.pagination import PageNumberPagination
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.http import Http404
 from django.utils import timezone
-from django.db.models import Q
+from django.utils.functional import cached_property
+from django.db.models import Case, Count, Exists, OuterRef, Q, Value, When
+from django.db.models.functions import Substr
 from apps.communications.models import AvisoComunicado, LecturaAviso
 from apps.communications.serializers import (
+    PREVIEW_CONTENIDO_LENGTH,
     AvisoComunicadoSerializer,
     AvisoComunicadoCreateSerializer,
     AvisoComunicadoListSerializer,
     LecturaAvisoSerializer,
-    LecturaAvisoCreateSerializer
+    LecturaAvisoCreateSerializer,
+    LecturaAvisoBulkCreateSerializer
+)
+from apps.communications.signals import CONTEOS_VERSION_CACHE_KEY, invalidar_conteos
+
+CONTEO_CACHE_TIMEOUT = 60  # segundos
+
+# Valores de tipo y prioridad, en el orden de las choices del modelo (claves de estadisticas)
+TIPO_CHOICES = tuple(valor for valor, _ in AvisoComunicado._meta.get_field('tipo').choices)
+PRIORIDAD_CHOICES = tuple(valor for valor, _ in AvisoComunicado._meta.get_field('prioridad').choices)
+
+# Columnas que necesita AvisoComunicadoListSerializer (autor_name usa nombre y apellido)
+AVISO_LIST_ONLY_FIELDS = (
+    'id', 'titulo', 'tipo', 'prioridad', 'fecha_publicacion', 'fecha_expiracion',
+    'is_active', 'is_published', 'created_at',
+    'condominio', 'condominio__nombre',
+    'autor', 'autor__first_name', 'autor__last_name',
+)
+
+# Columnas del listado de lecturas de un aviso (user_name se arma con nombre y apellido)
+LECTURA_FIELDS = (
+    'id', 'user', 'user__first_name', 'user__last_name',
+    'fecha_lectura', 'ip_address', 'created_at', 'updated_at',
 )
 
 
-class AvisoComunicadoViewSet(viewsets.ModelViewSet):
-    queryset = AvisoComunicado.objects.select_related('autor', 'condominio').all()
+def _fecha_local(value):
+    """
+    Fecha en ISO 8601 en la zona horaria local, igual que DateTimeField de DRF.
+    """
+    return timezone.localtime(value).isoformat() if value else None
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator que reutiliza el COUNT(*) de la misma consulta (mismo SQL y parámetros)
+    durante CONTEO_CACHE_TIMEOUT segundos. Las señales de communications cambian la
+    versión de las claves cuando se crean, modifican o eliminan avisos o lecturas.
+    """
+
+    @cached_property
+    def count(self):
+        try:
+            sql = str(self.object_list.query)
+        except (AttributeError, EmptyResultSet):
+            return super().count
+
+        version = cache.get_or_set(CONTEOS_VERSION_CACHE_KEY, 1, None)
+        key = f'communications:conteo:{version}:{hashlib.md5(sql.encode()).hexdigest()}'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, CONTEO_CACHE_TIMEOUT)
+        return count
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    django_paginator_class = CachedCountPaginator
+
+
+class AutoPrefetchMixin:
+    """
+    Aplica select_related/prefetch_related según las relaciones que recorre el serializer
+    de la acción (``source='autor.get_full_name'``, serializers anidados, ...).
+    Las rutas se calculan una vez por clase de serializer.
+    """
+
+    _rutas_por_serializer = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_paths, prefetch_paths = self.get_relation_paths(
+            self.get_serializer_class(), queryset.model
+        )
+        if select_paths:
+            queryset = queryset.select_related(*select_paths)
+        if prefetch_paths:
+            queryset = queryset.prefetch_related(*prefetch_paths)
+        return queryset
+
+    @classmethod
+    def get_relation_paths(cls, serializer_class, model):
+        rutas = cls._rutas_por_serializer.get(serializer_class)
+        if rutas is None:
+            select_paths, prefetch_paths = set(), set()
+            cls._recorrer_campos(serializer_class(), model, '', False, select_paths, prefetch_paths)
+            rutas = cls._rutas_por_serializer[serializer_class] = (
+                sorted(select_paths), sorted(prefetch_paths)
+            )
+        return rutas
+
+    @classmethod
+    def _recorrer_campos(cls, serializer, model, prefijo, en_prefetch, select_paths, prefetch_paths):
+        for nombre, field in serializer._declared_fields.items():
+            # Sin bind, source es None cuando coincide con el nombre del campo
+            source = field.source or nombre
+            if source == '*':
+                continue
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            es_serializer = isinstance(nested, serializers.BaseSerializer)
+
+            # Recorrer la ruta de source mientras sus partes sean relaciones del modelo; la última
+            # parte solo se carga si se serializa el objeto (un campo simple usa la FK *_id)
+            partes = source.split('.')
+            actual, ruta, prefetch = model, prefijo, en_prefetch
+            for i, parte in enumerate(partes):
+                try:
+                    model_field = actual._meta.get_field(parte)
+                except FieldDoesNotExist:
+                    break
+                if not model_field.is_relation or (i == len(partes) - 1 and not es_serializer):
+                    break
+                ruta = f'{ruta}__{parte}' if ruta else parte
+                prefetch = prefetch or model_field.many_to_many or model_field.one_to_many
+                (prefetch_paths if prefetch else select_paths).add(ruta)
+                actual = model_field.related_model
+
+            if es_serializer and actual is not model and hasattr(nested, 'Meta'):
+                cls._recorrer_campos(nested, actual, ruta, prefetch, select_paths, prefetch_paths)
+
+
+class AvisoComunicadoViewSet(AutoPrefetchMixin, viewsets.ModelViewSet):
+    queryset = AvisoComunicado.objects.with_expiration()
     serializer_class = AvisoComunicadoSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -25,6 +152,7 @@ class AvisoComunicadoViewSet(viewsets.ModelViewSet):
     filterset_fields = ['tipo', 'prioridad', 'condominio', 'is_active', 'is_published']
     ordering_fields = ['fecha_publicacion', 'fecha_expiracion', 'created_at', 'titulo']
     ordering = ['-fecha_publicacion']
+    pagination_class = CachedCountPageNumberPagination
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -33,7 +161,26 @@ class AvisoComunicadoViewSet(viewsets.ModelViewSet):
             return AvisoComunicadoCreateSerializer
         return AvisoComunicadoSerializer
 
+    # Acciones que responden con lecturas_count
+    ACCIONES_CON_LECTURAS_COUNT = ('list', 'retrieve')
+
     def get_queryset(self):
+        queryset = self._avisos_visibles()
+        # El resto de acciones (update, lecturas, marcar_como_leido, ...) solo necesitan el aviso
+        if self.action in self.ACCIONES_CON_LECTURAS_COUNT:
+            queryset = queryset.annotate(lecturas_count=Count('lecturas'))
+        if self.action == 'list':
+            # El listado solo muestra un preview: la base recorta el contenido y no se traen
+            # el contenido completo ni los adjuntos
+            queryset = queryset.annotate(
+                contenido_inicio=Substr('contenido', 1, PREVIEW_CONTENIDO_LENGTH + 1)
+            ).only(*AVISO_LIST_ONLY_FIELDS)
+        return queryset
+
+    def _avisos_visibles(self):
+        """
+        Avisos que el usuario puede ver, con los filtros de query params aplicados.
+        """
         queryset = super().get_queryset()
         
         # Filtros adicionales por query params
@@ -61,11 +208,10 @@ class AvisoComunicadoViewSet(viewsets.ModelViewSet):
         
         no_leidos = self.request.query_params.get('no_leidos', None)
         if no_leidos == 'true':
-            # Avisos no leídos por el usuario actual
-            avisos_leidos_ids = LecturaAviso.objects.filter(
-                user=user
-            ).values_list('aviso_id', flat=True)
-            queryset = queryset.exclude(id__in=avisos_leidos_ids)
+            # Avisos no leídos por el usuario actual (anti-join con NOT EXISTS)
+            queryset = queryset.filter(
+                ~Exists(LecturaAviso.objects.filter(aviso=OuterRef('pk'), user=user))
+            )
         
         return queryset
 
@@ -90,6 +236,44 @@ class AvisoComunicadoViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def marcar_como_leido_bulk(self, request):
+        """
+        Marcar varios avisos como leídos por el usuario actual.
+        Los avisos no disponibles o ya leídos se ignoran.
+        """
+        serializer = LecturaAvisoBulkCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        avisos_ids = set(serializer.validated_data['avisos'])
+
+        # Avisos visibles, activos y publicados entre los pedidos, sin los que el usuario ya leyó
+        disponibles = set(
+            self._avisos_visibles()
+            .filter(id__in=avisos_ids, is_active=True, is_published=True)
+            .exclude(lecturas__user=user)
+            .values_list('id', flat=True)
+        )
+
+        # unique_together (aviso, user) descarta las lecturas creadas en paralelo
+        LecturaAviso.objects.bulk_create(
+            [
+                LecturaAviso(aviso_id=aviso_id, user=user, ip_address=request.client_ip)
+                for aviso_id in disponibles
+            ],
+            ignore_conflicts=True
+        )
+        if disponibles:
+            invalidar_conteos()
+
+        return Response({
+            'message': 'Avisos marcados como leídos',
+            'marcados': sorted(disponibles),
+            'ignorados': sorted(avisos_ids - disponibles)
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['get'])
     def lecturas(self, request, pk=None):
         """
@@ -98,34 +282,58 @@ class AvisoComunicadoViewSet(viewsets.ModelViewSet):
         aviso = self.get_object()
         lecturas = LecturaAviso.objects.filter(
             aviso=aviso
-        ).select_related('user').order_by('-fecha_lectura')
+        ).order_by('-fecha_lectura').values(*LECTURA_FIELDS)
         
-        serializer = LecturaAvisoSerializer(lecturas, many=True)
-        return Response(serializer.data)
+        # Misma forma que LecturaAvisoSerializer, armada desde .values() sin instanciar modelos
+        return Response([
+            {
+                'id': lectura['id'],
+                'aviso': aviso.id,
+                'aviso_titulo': aviso.titulo,
+                'user': lectura['user'],
+                'user_name': f"{lectura['user__first_name']} {lectura['user__last_name']}".strip(),
+                'fecha_lectura': _fecha_local(lectura['fecha_lectura']),
+                'ip_address': lectura['ip_address'],
+                'created_at': _fecha_local(lectura['created_at']),
+                'updated_at': _fecha_local(lectura['updated_at']),
+            }
+            for lectura in lecturas
+        ])
 
     @action(detail=True, methods=['patch'])
     def toggle_status(self, request, pk=None):
         """
         Cambiar el estado activo/inactivo de un aviso
         """
-        aviso = self.get_object()
-        aviso.is_active = not aviso.is_active
-        aviso.save()
-        
-        serializer = self.get_serializer(aviso)
-        return Response(serializer.data)
+        return self._toggle(pk, 'is_active')
 
     @action(detail=True, methods=['patch'])
     def toggle_published(self, request, pk=None):
         """
         Cambiar el estado publicado/no publicado de un aviso
         """
-        aviso = self.get_object()
-        aviso.is_published = not aviso.is_published
-        aviso.save()
+        return self._toggle(pk, 'is_published')
+
+    def _toggle(self, pk, campo):
+        """
+        Invierte un campo booleano del aviso con un solo UPDATE de esa columna y devuelve su nuevo valor.
+        """
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise Http404
         
-        serializer = self.get_serializer(aviso)
-        return Response(serializer.data)
+        actualizados = self._avisos_visibles().filter(pk=pk).update(**{
+            campo: Case(When(**{campo: True}, then=Value(False)), default=Value(True)),
+            'updated_at': timezone.now(),
+        })
+        if not actualizados:
+            raise Http404
+        # update() no emite post_save
+        invalidar_conteos()
+        
+        valor = AvisoComunicado.objects.filter(pk=pk).values_list(campo, flat=True).get()
+        return Response({'id': pk, campo: valor})
 
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
@@ -133,40 +341,38 @@ class AvisoComunicadoViewSet(viewsets.ModelViewSet):
         Obtener estadísticas de avisos
         """
         user = request.user
-        queryset = self.get_queryset()
-        
-        total_avisos = queryset.count()
-        avisos_activos = queryset.filter(is_active=True).count()
-        avisos_publicados = queryset.filter(is_published=True).count()
+        queryset = self._avisos_visibles().select_related(None).order_by()
         
-        # Avisos no leídos por el usuario
-        avisos_leidos_ids = LecturaAviso.objects.filter(
-            user=user
-        ).values_list('aviso_id', flat=True)
-        avisos_no_leidos = queryset.exclude(id__in=avisos_leidos_ids).count()
+        # Totales y no leídos por el usuario en una sola consulta
+        leido = LecturaAviso.objects.filter(aviso=OuterRef('pk'), user=user)
+        totales = queryset.aggregate(
+            total=Count('id'),
+            activos=Count('id', filter=Q(is_active=True)),
+            publicados=Count('id', filter=Q(is_published=True)),
+            no_leidos=Count('id', filter=~Exists(leido)),
+        )
         
-        # Avisos por tipo
-        avisos_por_tipo = {}
-        for tipo, _ in AvisoComunicado._meta.get_field('tipo').choices:
-            avisos_por_tipo[tipo] = queryset.filter(tipo=tipo).count()
+        # Avisos por tipo y por prioridad con un GROUP BY cada uno; las opciones sin avisos quedan en 0
+        conteo_tipos = dict(queryset.values_list('tipo').annotate(total=Count('id')))
+        avisos_por_tipo = {tipo: conteo_tipos.get(tipo, 0) for tipo in TIPO_CHOICES}
         
-        # Avisos por prioridad
-        avisos_por_prioridad = {}
-        for prioridad, _ in AvisoComunicado._meta.get_field('prioridad').choices:
-            avisos_por_prioridad[prioridad] = queryset.filter(prioridad=prioridad).count()
+        conteo_prioridades = dict(queryset.values_list('prioridad').annotate(total=Count('id')))
+        avisos_por_prioridad = {
+            prioridad: conteo_prioridades.get(prioridad, 0) for prioridad in PRIORIDAD_CHOICES
+        }
         
         return Response({
-            'total_avisos': total_avisos,
-            'avisos_activos': avisos_activos,
-            'avisos_publicados': avisos_publicados,
-            'avisos_no_leidos': avisos_no_leidos,
+            'total_avisos': totales['total'],
+            'avisos_activos': totales['activos'],
+            'avisos_publicados': totales['publicados'],
+            'avisos_no_leidos': totales['no_leidos'],
             'avisos_por_tipo': avisos_por_tipo,
             'avisos_por_prioridad': avisos_por_prioridad,
         })
 
 
-class LecturaAvisoViewSet(viewsets.ModelViewSet):
-    queryset = LecturaAviso.objects.select_related('aviso', 'user').all()
+class LecturaAvisoViewSet(AutoPrefetchMixin, viewsets.ModelViewSet):
+    queryset = LecturaAviso.objects.all()
     serializer_class = LecturaAvisoSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -174,6 +380,7 @@ class LecturaAvisoViewSet(viewsets.ModelViewSet):
     filterset_fields = ['aviso', 'user']
     ordering_fields = ['fecha_lectura', 'created_at']
     ordering = ['-fecha_lectura']
+    pagination_class = CachedCountPageNumberPagination
     
     def get_serializer_class(self):
         if self.action == 'create':
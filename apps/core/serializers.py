@@ -1,10 +1,15 @@
+import orjson
 from rest_framework import serializers
 from apps.core.models import Condominio, Bloque, ConfiguracionSistema
 
+# Valores aceptados para las configuraciones de tipo boolean
+VALORES_BOOLEANOS = frozenset({'true', 'false', '1', '0', 'yes', 'no'})
+
 
 class CondominioSerializer(serializers.ModelSerializer):
-    bloques_count = serializers.SerializerMethodField()
-    usuarios_count = serializers.SerializerMethodField()
+    # Anotados en CondominioViewSet.get_queryset
+    bloques_count = serializers.IntegerField(read_only=True)
+    usuarios_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Condominio
@@ -14,16 +19,11 @@ class CondominioSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         )
 
-    def get_bloques_count(self, obj):
-        return obj.bloques.filter(is_active=True).count()
-
-    def get_usuarios_count(self, obj):
-        return obj.usuarios.filter(is_active=True).count()
-
 
 class BloqueSerializer(serializers.ModelSerializer):
     condominio_name = serializers.CharField(source='condominio.nombre', read_only=True)
-    unidades_count = serializers.SerializerMethodField()
+    # Anotado en BloqueViewSet.get_queryset
+    unidades_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Bloque
@@ -32,9 +32,6 @@ class BloqueSerializer(serializers.ModelSerializer):
             'is_active', 'unidades_count', 'created_at', 'updated_at'
         )
 
-    def get_unidades_count(self, obj):
-        return obj.unidades.filter(is_active=True).count()
-
 
 class ConfiguracionSistemaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -63,11 +60,11 @@ class ConfiguracionSistemaSerializer(serializers.ModelSerializer):
             elif tipo == 'float':
                 float(valor)
             elif tipo == 'boolean':
-                if valor.lower() not in ['true', 'false', '1', '0', 'yes', 'no']:
+                if valor.lower() not in VALORES_BOOLEANOS:
                     raise ValueError()
             elif tipo == 'json':
-                import json
-                json.loads(valor)
+                # orjson.JSONDecodeError es subclase de ValueError
+                orjson.loads(valor)
         except (ValueError, TypeError):
             raise serializers.ValidationError(f"El valor '{valor}' no es válido para el tipo '{tipo}'")
         
@@ -2,6 +2,7 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db.models import Count, Q
 from apps.core.models import Condominio, Bloque, ConfiguracionSistema
 from apps.core.serializers import CondominioSerializer, BloqueSerializer, ConfiguracionSistemaSerializer
 
@@ -16,6 +17,20 @@ class CondominioViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nombre', 'created_at']
     ordering = ['nombre']
 
+    def get_queryset(self):
+        # Conteos de bloques y usuarios activos en la misma consulta; distinct porque
+        # los dos JOIN multiplican las filas entre sí
+        return super().get_queryset().annotate(
+            bloques_count=Count('bloques', filter=Q(bloques__is_active=True), distinct=True),
+            usuarios_count=Count('usuarios', filter=Q(usuarios__is_active=True), distinct=True),
+        )
+
+    def perform_create(self, serializer):
+        # Un condominio recién creado no tiene bloques ni usuarios
+        serializer.save()
+        serializer.instance.bloques_count = 0
+        serializer.instance.usuarios_count = 0
+
 
 class BloqueViewSet(viewsets.ModelViewSet):
     queryset = Bloque.objects.all()
@@ -27,6 +42,16 @@ class BloqueViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nombre', 'created_at']
     ordering = ['condominio__nombre', 'nombre']
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('condominio').annotate(
+            unidades_count=Count('unidades', filter=Q(unidades__is_active=True))
+        )
+
+    def perform_create(self, serializer):
+        # Un bloque recién creado no tiene unidades
+        serializer.save()
+        serializer.instance.unidades_count = 0
+
 
 class ConfiguracionSistemaViewSet(viewsets.ModelViewSet):
     queryset = ConfiguracionSistema.objects.all()
@@ -5,14 +5,14 @@ from apps.core.models import Condominio
 
 
 class RoleSerializer(serializers.ModelSerializer):
-    permissions_count = serializers.SerializerMethodField()
+    # Anotado en el queryset de RoleViewSet con Count('permissions')
+    permissions_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Role
         fields = ('id', 'nombre', 'descripcion', 'is_active', 'permissions_count', 'created_at', 'updated_at')
-    
-    def get_permissions_count(self, obj):
-        return obj.permissions.count()
+        # RoleViewSet es de solo lectura
+        read_only_fields = fields
 
 
 class PermissionSerializer(serializers.ModelSerializer):
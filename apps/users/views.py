@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db.models import Count
 from apps.users.models import User, Role, Permission
 from apps.users.serializers import UserSerializer, UserCreateSerializer, RoleSerializer, PermissionSerializer
 
@@ -30,7 +31,7 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         user = self.get_object()
         user.is_active = not user.is_active
-        user.save()
+        user.save(update_fields=['is_active', 'updated_at'])
         
         serializer = self.get_serializer(user)
         return Response(serializer.data)
@@ -50,13 +51,13 @@ class UserViewSet(viewsets.ModelViewSet):
             )
         
         user.set_password(new_password)
-        user.save()
+        user.save(update_fields=['password', 'updated_at'])
         
         return Response({'message': 'Contraseña actualizada exitosamente'})
 
 
 class RoleViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Role.objects.filter(is_active=True)
+    queryset = Role.objects.filter(is_active=True).annotate(permissions_count=Count('permissions'))
     serializer_class = RoleSerializer
     permission_classes = [IsAuthenticated]
     ordering = ['nombre']
@@ -94,6 +94,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.authentication.middleware.ClientIPMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -179,6 +180,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
+AUTHENTICATION_BACKENDS = [
+    'apps.authentication.backends.SelectRelatedModelBackend',
+]
+
 # Google Cloud Vision Configuration
 GOOGLE_CLOUD_CREDENTIALS_JSON = config('GOOGLE_CLOUD_CREDENTIALS_JSON', default=None)
 GOOGLE_CLOUD_CREDENTIALS_PATH = BASE_DIR / 'google-credentials.json'
@@ -189,6 +194,9 @@ AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default=None)
 AWS_DEFAULT_REGION = config('AWS_DEFAULT_REGION', default='us-east-1')
 AWS_REKOGNITION_COLLECTION_ID = config('AWS_REKOGNITION_COLLECTION_ID', default='smart-condominium-faces')
 AWS_S3_BUCKET_NAME = config('AWS_S3_BUCKET_NAME', default='si2-examen-parcial')
+# Notificación SNS de fin de trabajos de Rekognition Video (opcional; sin ella se consulta el estado)
+REKOGNITION_SNS_TOPIC_ARN = config('REKOGNITION_SNS_TOPIC_ARN', default=None)
+REKOGNITION_ROLE_ARN = config('REKOGNITION_ROLE_ARN', default=None)
 
 # Firebase Configuration
 FIREBASE_PROJECT_ID = config('FIREBASE_PROJECT_ID', default='smart-condominium-d84b9')
@@ -198,7 +206,11 @@ FIREBASE_CREDENTIALS_PATH = BASE_DIR / 'firebase-credentials.json'
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.backends.SelectRelatedJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'drf_orjson_renderer.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',